@@ -8,7 +8,7 @@ import io
 def detect_barcode(image):
     """Detect barcodes in the image and return the decoded information."""
     # Convert the image to grayscale
-    gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    gray_image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
     
     # Decode barcodes
     barcodes = decode(gray_image)
@@ -15,7 +15,7 @@ def upscale_image(image, scale_factor=2):
 def detect_barcode(image):
     """Detect barcodes in the upscaled image and return the decoded information."""
     # Convert the image to grayscale
-    gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    gray_image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
     
     # Decode barcodes
     barcodes = decode(gray_image)
@@ -6,7 +6,7 @@ from PIL import Image
 
 # Define a function to detect barcodes
 def detect_barcode(image):
-    gray = cv2.cvtColor(np.array(image), cv2.COLOR_BGR2GRAY)
+    gray = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2GRAY)
     barcodes = decode(gray)
     for barcode in barcodes:
         (x, y, w, h) = barcode.rect
@@ -30,4 +30,4 @@ if img_file:
     image_with_barcodes = detect_barcode(image)
 
     # Convert the frame to an image for Streamlit display
-    st.image(image_with_barcodes, channels="BGR")
+    st.image(image_with_barcodes)
@@ -1,90 +1,232 @@
+import time
 import streamlit as st
-import cv2
-import numpy as np
-from PIL import Image
-import easyocr
-from datetime import datetime
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import os
-import pytz
-from dotenv import load_dotenv
-
-# Load environment variables from the .env file
-load_dotenv()
-# Now access the environment variables
-project_id = os.getenv('GCP_PROJECT_ID')
-private_key_id = os.getenv('GCP_PRIVATE_KEY_ID')
-private_key = os.getenv('GCP_PRIVATE_KEY')
-client_email = os.getenv('GCP_CLIENT_EMAIL')
-client_id = os.getenv('GCP_CLIENT_ID')
-client_x509_cert_url = os.getenv('GCP_CLIENT_X509_CERT_URL')
-
-def upscale_image(image, scale_factor=2):
-    height, width = image.shape[:2]
-    new_height, new_width = int(height * scale_factor), int(width * scale_factor)
-    return cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
-
-def perform_ocr(image):
-    reader = easyocr.Reader(['en'])
-    results = reader.readtext(image, allowlist='0123456789')
-    ocr_text = [result[1] for result in results if len(result[1]) >= 4]
-    return ocr_text
-
-def connect_to_google_sheets(sheet_name):
-    required_vars = [
-        "GCP_PROJECT_ID", "GCP_PRIVATE_KEY_ID", "GCP_PRIVATE_KEY",
-        "GCP_CLIENT_EMAIL", "GCP_CLIENT_ID", "GCP_CLIENT_X509_CERT_URL"
-    ]
-    
-    for var in required_vars:
-        if os.getenv(var) is None:
-            raise ValueError(f"Environment variable {var} is not set.")
-    
-    creds_json = {
-        "type": "service_account",
-        "project_id": project_id,
-        "private_key_id": private_key_id,
-        "private_key": private_key,
-        "client_email": client_email,
-        "client_id": client_id,
-        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-        "token_uri": "https://oauth2.googleapis.com/token",
-        "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-        "client_x509_cert_url": client_x509_cert_url
-    }
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_json)
-    client = gspread.authorize(creds)
-    return client.open(sheet_name).sheet1
-
-def save_to_google_sheets(sheet, results, all_match, device_name):
+from reader_pool import get_ocr_executor, get_reader_pool
+from boot import is_ready, status, warm_up
+from concurrent.futures import wait
+from sheets_queue import get_write_queue, resume_spooled_uploads
+from previews import preview_jpeg
+from barcode import BARCODE_CAPTURES
+from ocr_pipeline import DECODE_MODE, build_row, load_image, read_capture, select_serials, serials_match
+from frame_quality import check_frame
+from image_store import get_image_store
+from label_record import LabelRecord, capture_hash, session_memory
+from tracing import span, start_metrics_server, use_trace
+
+def ocr_capture(image, step, device_name, image_hash, with_overlay=False, trace=None):
+    """Background task for one capture: returns (candidates, regions read, seconds).
+
+    The region overlay preview, when asked for, goes to the image store under the capture's hash.
+    """
+    start = time.perf_counter()
+    # Retakes and double taps of the same photo are answered from the cache
+    with use_trace(trace):
+        candidates, boxes = read_capture(image, step in BARCODE_CAPTURES, device_name)
+    if with_overlay and boxes:
+        get_image_store().put(f"{image_hash}/overlay", preview_jpeg(image, boxes))
+    return candidates, len(boxes), time.perf_counter() - start
+
+def keep_capture(img_file, image_hash, image):
+    """Put an accepted capture's preview and original JPEG in the shared image store."""
+    store = get_image_store()
+    store.put(f"{image_hash}/preview", preview_jpeg(image))
+    store.put(f"{image_hash}/original", img_file.getvalue())
+
+def show_capture(step, image_hash):
+    """Show a capture's stored preview, and the full photo only when asked for."""
+    store = get_image_store()
+    preview = store.get(f"{image_hash}/preview")
+    if preview is None:
+        st.caption(f"画像 {step} のプレビューは期限切れです The preview of Image {step} has expired")
+        return
+    st.image(preview, caption=f'キャプチャされた画像 Captured Image {step}', use_column_width=True)
+    if st.checkbox(f"原寸で表示 Show full resolution {step}", key=f"full_{step}"):
+        original = store.get(f"{image_hash}/original")
+        if original is not None:
+            st.image(original, use_column_width=True)
+
+def show_ocr_outcome(step, record, show_roi):
+    """Write the OCR result of a finished capture."""
+    index = step - 1
+    if record.errors[index]:
+        st.error(f"画像 {step} のOCRに失敗しました OCR failed for Image {step}: {record.errors[index]}")
+    candidates = record.candidates[index]
+
+    overlay = get_image_store().get(f"{record.image_hashes[index]}/overlay")
+    if overlay is not None:
+        st.image(overlay, caption=f'検出領域 Detected regions {step}', use_column_width=True)
+    elif show_roi and record.regions[index] == 0 and not record.errors[index]:
+        st.write("領域が検出されなかったため全体をOCRしました No regions found, OCR ran on the full image.")
+
+    if candidates:
+        st.write(f"画像から抽出された数字 Extracted Numbers from Image {step}:")
+        st.write([f"{candidate['text']} ({candidate.get('source', 'ocr')} {candidate['confidence']:.2f})"
+                  for candidate in candidates])
+    else:
+        st.write(f"画像に数字が検出されませんでした No numbers detected in Image {step}.")
+
+def show_memory(panel):
+    """Fill the sidebar panel with this session's memory use and the shared image store's."""
+    sizes = session_memory(st.session_state)
+    stats = get_image_store().stats()
+    with panel.container():
+        st.write(f"セッションメモリ Session memory: {sum(sizes.values()) / 1024:.1f} KB")
+        st.table([{"key": key, "KB": round(size / 1024, 1)} for key, size in sizes.items()])
+        st.write(f"共有画像ストア Shared image store: {stats['entries']} images, {stats['bytes'] / 1024 / 1024:.1f} MB")
+
+def show_timings(panel, trace, sheet_name):
+    """Fill the sidebar panel with the stage timings for the current label, the upload queue and the reader pool."""
+    totals = {}
+    for stage, seconds in list(trace):
+        calls, total = totals.get(stage, (0, 0.0))
+        totals[stage] = (calls + 1, total + seconds)
+    with panel.container():
+        st.write("処理時間 Stage timings (ms)")
+        st.table([{"stage": stage, "calls": calls, "ms": round(total * 1000, 1)}
+                  for stage, (calls, total) in totals.items()])
+        queue_stats = get_write_queue(sheet_name).stats()
+        st.write(f"アップロード待ち Sheets queue: {queue_stats['depth']} waiting, {queue_stats['parked']} parked, "
+                 f"last flush {queue_stats['last_flush_seconds'] * 1000:.0f} ms")
+        pool_stats = get_reader_pool().stats()
+        st.write(f"OCRリーダー Reader pool: {pool_stats['idle']}/{pool_stats['size']} idle, "
+                 f"lease wait avg {pool_stats['lease_wait_seconds_avg'] * 1000:.0f} ms, "
+                 f"max {pool_stats['lease_wait_seconds_max'] * 1000:.0f} ms")
+
+def save_to_google_sheets(sheet_name, results, all_match, device_name):
     """Save the comparison results to Google Sheets with match status."""
-    # Convert UTC time to Japan Standard Time (JST)
-    utc_now = datetime.now(pytz.utc)
-    jst_now = utc_now.astimezone(pytz.timezone('Asia/Tokyo'))
-    timestamp = jst_now.strftime('%Y-%m-%d %H:%M:%S')
-    
     # Ensure results are saved only once
     if 'saved' not in st.session_state:
         st.session_state.saved = False
 
     if not st.session_state.saved:
-        # Append results with match status and device name to Google Sheets
-        match_status = "匹敵 (Match)" if all_match else "一致しない (No Match)"
-        sheet.append_row([device_name] + results + [match_status, timestamp])
+        # Spool results with match status and device name to Google Sheets
+        get_write_queue(sheet_name).put(build_row(device_name, results, all_match))
         st.session_state.saved = True
 
+# Reasons frame_quality.check_frame rejects a capture
+QUALITY_PROBLEMS = {
+    "blurred": "ぼやけています。ピントを合わせて撮り直してください The photo is blurred; focus and retake it",
+    "glare": "反射が強すぎます。角度を変えて撮り直してください Too much glare; tilt the label and retake it",
+    "too_dark": "暗すぎます。明るい場所で撮り直してください The photo is too dark; add light and retake it",
+    "too_bright": "明るすぎます。撮り直してください The photo is overexposed; retake it",
+    "low_contrast": "コントラストが低すぎます。撮り直してください The photo has too little contrast; retake it",
+}
+
+# Live-scan status codes from stream_scanner.LabelScanner, plus the quality problems above
+SCAN_STATUS = {
+    **QUALITY_PROBLEMS,
+    "waiting": "ラベルをカメラに向けてください Show a label to the camera",
+    "moving": "ラベルを静止させてください Hold the label still",
+    "no_label": "ラベルが見つかりません No label in view",
+    "reading": "読み取り中 Reading...",
+    "finished": "ラベルを保存しました。次のラベルへ Label saved, show the next one",
+}
+
+def show_problem(problem, quality):
+    """Tell the operator why a capture cannot be read."""
+    st.error(QUALITY_PROBLEMS[problem])
+    st.caption(f"sharpness {quality['sharpness']:.0f}, glare {quality['glare']:.1%}, "
+               f"brightness {quality['brightness']:.0f}, contrast {quality['contrast']}")
+
+def accept_capture(img_file, trace):
+    """Decode and check a capture; returns (image, hash), or None after showing why it was rejected.
+
+    Unreadable photos are rejected here, before upscaling or OCR, and never reach the
+    image store. A rejected photo stays in the camera widget across reruns, so its
+    verdict is remembered by hash instead of decoding it again.
+    """
+    image_hash = capture_hash(img_file.getvalue())
+    rejected = st.session_state.get('rejected')
+    if rejected and rejected[0] == image_hash:
+        show_problem(*rejected[1:])
+        return None
+    with use_trace(trace):
+        image = load_image(img_file)
+        with span("quality"):
+            problem, quality = check_frame(image)
+    if problem:
+        st.session_state.rejected = (image_hash, problem, quality)
+        show_problem(problem, quality)
+        return None
+    return image, image_hash
+
+def show_scan_state(placeholder, state):
+    """Write the live scanner's status, reads so far and finished labels."""
+    with placeholder.container():
+        st.info(SCAN_STATUS.get(state["status"], state["status"]))
+        st.write(f"読み取り結果 Reads: {state['reads']}")
+        if state["labels"]:
+            st.write(f"保存済みラベル Saved labels: {state['finished']}")
+            st.table([{"serial": label["serial"], "time": time.strftime('%H:%M:%S', time.localtime(label["time"]))}
+                      for label in state["labels"][-10:]])
+
+def live_scan(sheet_name, device_name):
+    """Scan labels continuously from the camera, saving each after three consistent reads."""
+    # Imported here so the three-photo flow does not need the WebRTC stack
+    from streamlit_webrtc import WebRtcMode, webrtc_streamer
+    from stream_scanner import STREAM_SOURCE, LabelScanner
+
+    scanner = st.session_state.get('scanner')
+    if scanner is None or scanner.device_name != device_name:
+        write_queue = get_write_queue(sheet_name)
+        scanner = st.session_state.scanner = LabelScanner(
+            device_name, on_label=lambda results, all_match: write_queue.put(build_row(device_name, results, all_match)))
+
+    def on_frame(frame):
+        # "gray" is the Y plane of the camera's YUV frame, so no colour conversion is needed
+        scanner.offer(frame.to_ndarray(format="gray" if DECODE_MODE == "L" else "rgb24"))
+        return frame
+
+    if STREAM_SOURCE:
+        # Loopback test harness: a server-side video file stands in for the browser camera
+        from aiortc.contrib.media import MediaPlayer
+        source = {"mode": WebRtcMode.RECVONLY, "player_factory": lambda: MediaPlayer(STREAM_SOURCE, loop=True)}
+    else:
+        source = {"media_stream_constraints": {"video": True, "audio": False}}
+    ctx = webrtc_streamer(key="live-scan", video_frame_callback=on_frame, **source)
+
+    placeholder = st.empty()
+    while ctx.state.playing:
+        show_scan_state(placeholder, scanner.snapshot())
+        time.sleep(0.5)
+    show_scan_state(placeholder, scanner.snapshot())
+
 def main():
     st.title("シンワアクティブ SHINWA ACTIVE")
 
+    # serve.py loads the readers before the first session; with plain `streamlit run` the first session does
+    if not is_ready():
+        with st.spinner("OCRモデルを読み込み中 Loading OCR models..."):
+            warm_up()
+    if not is_ready():
+        # Warm-up runs once per process; show why it failed rather than retrying on every rerun
+        st.error("OCRモデルを読み込めませんでした。管理者に連絡してください The OCR models failed to load; contact the administrator")
+        for phase, error in status()["errors"].items():
+            st.error(f"{phase}: {error}")
+        st.stop()
+    # Serves /metrics when OCR_METRICS_PORT is set
+    start_metrics_server()
+
     if 'step' not in st.session_state:
         st.session_state.step = 1
-    if 'ocr_results' not in st.session_state:
-        st.session_state.ocr_results = []
+    # Outcomes of the label being verified; its images are in the shared image store
+    if 'label' not in st.session_state:
+        st.session_state.label = LabelRecord()
     if 'saved' not in st.session_state:
         st.session_state.saved = False
+    if 'trace' not in st.session_state:
+        st.session_state.trace = []
+    if 'retake' not in st.session_state:
+        st.session_state.retake = None
+
+    # Rows are spooled locally and uploaded in the background, so Sheets is not contacted here
+    sheet_name = "ocr_data"
+    resume_spooled_uploads()
 
-    sheet = connect_to_google_sheets("ocr_data")
+    show_roi = st.sidebar.checkbox("検出領域を表示 Show detected regions")
+    # Spans are only collected for the label while the timings panel is open
+    timings_panel = st.sidebar.empty()
+    trace = st.session_state.trace if st.sidebar.checkbox("処理時間を表示 Show timings") else None
+    memory_panel = st.sidebar.empty() if st.sidebar.checkbox("メモリ使用量を表示 Show memory use") else None
 
     # Prompt user to input their device name
     device_name = st.text_input("デバイス名を入力してください。Enter your device name:")
@@ -94,64 +236,114 @@ def main():
         st.warning("デバイス名を入力してください。Please enter your device name.")
         return
 
+    record = st.session_state.label
+    record.device = device_name
+
+    mode = st.sidebar.radio("モード Mode", ["3枚撮影 Three photos", "ライブスキャン Live scan"])
+    if mode == "ライブスキャン Live scan":
+        live_scan(sheet_name, device_name)
+        return
+
+    # Show each capture's result as soon as its background OCR finishes
+    record.collect()
+    for i in range(1, record.captured() + 1):
+        show_capture(i, record.image_hashes[i - 1])
+        if record.candidates[i - 1] is not None:
+            show_ocr_outcome(i, record, show_roi)
+        else:
+            st.write(f"画像 {i} を処理中です Processing Image {i}...")
+
     if st.session_state.step <= 3:
         st.write(f"Step {st.session_state.step}: 「画像をキャプチャしてください」Capture Image {st.session_state.step}")
         img_file = st.camera_input(f"「画像をキャプチャしてください」Capture Image {st.session_state.step}")
 
-        if img_file:
-            image = Image.open(img_file)
-            image_np = np.array(image)
-            upscaled_image = upscale_image(image_np)
-            st.image(image, caption=f'キャプチャされた画像 Captured Image {st.session_state.step}', use_column_width=True)
+        accepted = accept_capture(img_file, trace) if img_file else None
+        if accepted:
+            image_np, image_hash = accepted
+            keep_capture(img_file, image_hash, image_np)
+            show_capture(st.session_state.step, image_hash)
 
-            ocr_text = perform_ocr(upscaled_image)
-
-            if ocr_text:
-                st.write(f"画像から抽出された数字 Extracted Numbers from Image {st.session_state.step}:")
-                st.write(ocr_text)
-                st.session_state.ocr_results.append(ocr_text)
-            else:
-                st.write(f"画像に数字が検出されませんでした No numbers detected in Image {st.session_state.step}.")
-                st.session_state.ocr_results.append([])
+            # OCR runs in the background so the operator can take the next photo right away
+            step = st.session_state.step
+            record.submit(step - 1, image_hash, get_ocr_executor().submit(
+                ocr_capture, image_np, step, device_name, image_hash, show_roi, trace))
 
             st.session_state.step += 1
             if st.session_state.step <= 3:
                 st.rerun()
 
-    if len(st.session_state.ocr_results) == 3:
-        st.write("OCR結果の比較 Comparison of OCR results:")
+    if st.session_state.retake is not None:
+        # Only the capture the comparison flagged is taken again
+        index = st.session_state.retake
+        img_file = st.camera_input(f"「画像を撮り直してください」Retake Image {index + 1}")
 
-        results = [ocr[0] if ocr else 'N/A' for ocr in st.session_state.ocr_results[:2]]
+        accepted = accept_capture(img_file, trace) if img_file else None
+        if accepted:
+            image_np, image_hash = accepted
+            keep_capture(img_file, image_hash, image_np)
+            record.submit(index, image_hash, get_ocr_executor().submit(
+                ocr_capture, image_np, index + 1, device_name, image_hash, show_roi, trace))
+            st.session_state.saved = False
+            st.session_state.retake = None
+            st.rerun()
+        return
 
-        if len(st.session_state.ocr_results[2]) >= 2:
-            results.append(st.session_state.ocr_results[2][1][-7:])
-        else:
-            results.append('N/A')
+    if record.captured() == 3 and not record.complete():
+        futures = record.running()
+        progress = st.progress(0.0, text="OCR処理中 Running OCR...")
+        while True:
+            done, _ = wait(futures, timeout=0.25)
+            progress.progress(len(done) / len(futures), text=f"OCR処理中 Running OCR... {len(done)}/{len(futures)}")
+            if len(done) == len(futures):
+                break
+        progress.empty()
+        # Rerun once so the per-image results above include the last capture
+        record.collect()
+        st.rerun()
+
+    if record.complete():
+        st.write("OCR結果の比較 Comparison of OCR results:")
 
-        all_match = len(set(results)) == 1 and 'N/A' not in results
+        selections = select_serials(record.candidates)
+        results = [selection["serial"] for selection in selections]
+        all_match = serials_match(results)
 
-        for i, result in enumerate(results, 1):
-            if all_match:
-                st.markdown(f"OCR結果 OCR result {i}: <font color='green'>{result}</font>", unsafe_allow_html=True)
-            else:
-                st.markdown(f"OCR結果 OCR result {i}: <font color='red'>{result}</font>", unsafe_allow_html=True)
+        for i, selection in enumerate(selections, 1):
+            color = 'green' if all_match else 'red'
+            st.markdown(f"OCR結果 OCR result {i}: <font color='{color}'>{selection['serial']}</font> "
+                        f"({selection['source'] or '-'}, スコア score {selection['score']:.2f})", unsafe_allow_html=True)
 
         if all_match:
             st.success("すべての画像のOCR結果が一致しました！The OCR results from all images match!")
         else:
             st.error("OCRの結果が一致しません。The OCR results do not match.")
+            # Offer to retake only the captures that disagree with the best-supported serial
+            for i, selection in enumerate(selections):
+                if selection["retake"] and st.button(f"画像 {i + 1} を撮り直す Retake Image {i + 1}", key=f"retake_{i}"):
+                    st.session_state.retake = i
+                    st.rerun()
 
         if not st.session_state.saved:
             # Save results with match status and device name
-            save_to_google_sheets(sheet, results, all_match, device_name)
+            with use_trace(trace):
+                save_to_google_sheets(sheet_name, results, all_match, device_name)
             st.write(f"OCR結果がGoogle Sheetsに保存されました Results saved to Google Sheets")
 
         if st.button("最初からやり直してください。Start Over"):
             # Reset session state
+            # The finished label's images are released now rather than when they expire
+            get_image_store().discard(record.image_keys())
             st.session_state.step = 1
-            st.session_state.ocr_results = []
+            st.session_state.label = LabelRecord(device_name)
             st.session_state.saved = False
+            st.session_state.trace = []
+            st.session_state.retake = None
             st.rerun()
 
+    if trace is not None:
+        show_timings(timings_panel, trace, sheet_name)
+    if memory_panel is not None:
+        show_memory(memory_panel)
+
 if __name__ == "__main__":
     main()
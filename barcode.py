@@ -0,0 +1,212 @@
+"""Barcode decoding with pyzbar as a fast first pass before OCR.
+
+Decoding a barcode takes milliseconds where OCR takes seconds, so captures of
+the barcode side of a label (OCR_BARCODE_CAPTURES, default 1 and 2) try it
+first. Preprocessing variants (grayscale, Otsu, CLAHE, adaptive threshold,
+small rotations and rescales) are decoded in parallel on a thread pool, and
+the first one that decodes wins. The winning variant and barcode region are
+remembered per device, so that device's next capture tries them first on a
+crop. Decoded values come back in the same candidate shape as OCR readings,
+so the comparison accepts either source. Without pyzbar or the zbar library
+everything goes to OCR.
+"""
+import contextvars
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+from roi import pad_box, to_gray
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+BARCODE_ENABLED = os.getenv('OCR_BARCODE', '1') == '1'
+# 1-based capture numbers that try a barcode before OCR; the others are the printed-digits captures
+BARCODE_CAPTURES = {int(step) for step in os.getenv('OCR_BARCODE_CAPTURES', '1,2').split(',') if step.strip()}
+BARCODE_WORKERS = int(os.getenv('OCR_BARCODE_WORKERS', str(min(4, os.cpu_count() or 1))))
+# Devices whose winning variant and barcode region are remembered
+MAX_HINTS = 256
+# Padding around a remembered barcode region, as a fraction of its height
+HINT_PADDING = 0.5
+
+_decode = None
+_executor = None
+_hints = OrderedDict()
+_lock = threading.Lock()
+
+
+def _load_decoder():
+    """Return pyzbar's decode function, or None when pyzbar or libzbar is missing."""
+    global _decode, BARCODE_ENABLED
+    if _decode is None and BARCODE_ENABLED:
+        try:
+            from pyzbar.pyzbar import decode
+        except ImportError as exc:
+            logger.warning("Barcode decoding disabled, OCR only: %s", exc)
+            BARCODE_ENABLED = False
+        else:
+            _decode = decode
+    return _decode
+
+
+def rotate(gray, angle):
+    """Rotate about the centre, growing the canvas so the corners stay in frame."""
+    height, width = gray.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    new_width, new_height = int(height * sin + width * cos), int(height * cos + width * sin)
+    matrix[0, 2] += new_width / 2 - width / 2
+    matrix[1, 2] += new_height / 2 - height / 2
+    return cv2.warpAffine(gray, matrix, (new_width, new_height), borderValue=255), matrix
+
+
+def rescale(gray, factor):
+    interpolation = cv2.INTER_AREA if factor < 1 else cv2.INTER_CUBIC
+    scaled = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=interpolation)
+    return scaled, np.array([[factor, 0, 0], [0, factor, 0]], np.float64)
+
+
+def otsu(gray):
+    return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[1], None
+
+
+def clahe(gray):
+    # Local contrast equalization lifts bars washed out by glare
+    return cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8)).apply(gray), None
+
+
+def adaptive(gray):
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10), None
+
+
+# name -> function(gray) returning (variant image, matrix mapping capture coordinates into it, or None)
+VARIANTS = {
+    "gray": lambda gray: (gray, None),
+    "otsu": otsu,
+    "clahe": clahe,
+    "adaptive": adaptive,
+    "rotate_-12": lambda gray: rotate(gray, -12),
+    "rotate_12": lambda gray: rotate(gray, 12),
+    "scale_0.5": lambda gray: rescale(gray, 0.5),
+    "scale_2": lambda gray: rescale(gray, 2.0),
+}
+
+
+def to_capture_box(rect, matrix, width, height, origin=(0, 0)):
+    """Map a pyzbar rect found in a variant back to an [x, y, w, h] box in the width x height capture.
+
+    origin is the top-left corner of the crop the variant was made from.
+    """
+    x, y, w, h = rect.left, rect.top, rect.width, rect.height
+    corners = [(x, y), (x + w, y), (x, y + h), (x + w, y + h)]
+    if matrix is not None:
+        inverse = cv2.invertAffineTransform(matrix)
+        corners = [(inverse[0, 0] * cx + inverse[0, 1] * cy + inverse[0, 2],
+                    inverse[1, 0] * cx + inverse[1, 1] * cy + inverse[1, 2]) for cx, cy in corners]
+    xs = [cx + origin[0] for cx, _ in corners]
+    ys = [cy + origin[1] for _, cy in corners]
+    x0, y0 = max(int(min(xs)), 0), max(int(min(ys)), 0)
+    x1, y1 = min(int(max(xs)), width), min(int(max(ys)), height)
+    return [x0, y0, x1 - x0, y1 - y0]
+
+
+def decode_variant(name, gray, frame_shape, origin=(0, 0)):
+    """Decode one preprocessing variant of gray; returns barcode candidates in capture coordinates."""
+    decode = _load_decoder()
+    with span(f"barcode_{name}"):
+        variant, matrix = VARIANTS[name](gray)
+        barcodes = decode(variant)
+    candidates = []
+    for barcode in barcodes:
+        digits = ''.join(filter(str.isdigit, barcode.data.decode('utf-8', errors='replace')))
+        if digits:
+            # A decoded barcode has passed its checksum, so it is as confident as a reading gets
+            box = to_capture_box(barcode.rect, matrix, frame_shape[1], frame_shape[0], origin)
+            candidates.append({"text": digits, "confidence": 1.0, "source": "barcode", "variant": name, "box": box})
+    return candidates
+
+
+def get_barcode_executor():
+    """Return the process-wide pool that decodes variants in parallel (zbar releases the GIL)."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=BARCODE_WORKERS, thread_name_prefix="barcode")
+    return _executor
+
+
+def remember(device, candidates):
+    """Keep the winning variant and barcode region for device, evicting the oldest device."""
+    if not device:
+        return
+    x0 = min(candidate["box"][0] for candidate in candidates)
+    y0 = min(candidate["box"][1] for candidate in candidates)
+    x1 = max(candidate["box"][0] + candidate["box"][2] for candidate in candidates)
+    y1 = max(candidate["box"][1] + candidate["box"][3] for candidate in candidates)
+    with _lock:
+        _hints[device] = (candidates[0]["variant"], (x0, y0, x1 - x0, y1 - y0))
+        _hints.move_to_end(device)
+        while len(_hints) > MAX_HINTS:
+            _hints.popitem(last=False)
+
+
+def device_hint(device):
+    """Return the (variant, box) that last decoded for device, or None."""
+    with _lock:
+        return _hints.get(device)
+
+
+def decode_parallel(gray, first=None):
+    """Decode every variant on the thread pool and return the first candidates found.
+
+    The variant named first is submitted ahead of the others; variants not started
+    yet when one succeeds are cancelled.
+    """
+    names = sorted(VARIANTS, key=lambda name: name != first)
+    # Each task gets its own copy of the context so spans reach the caller's trace
+    futures = [get_barcode_executor().submit(contextvars.copy_context().run, decode_variant, name, gray, gray.shape)
+               for name in names]
+    try:
+        for future in as_completed(futures):
+            candidates = future.result()
+            if candidates:
+                return candidates
+    finally:
+        for future in futures:
+            future.cancel()
+    return []
+
+
+def decode_barcodes(image, device=None):
+    """Decode the barcodes in a capture, stopping at the first variant that decodes.
+
+    The last winning variant and barcode region for device are tried first, on a crop,
+    before all variants are decoded in parallel on the whole frame.
+    Returns candidates shaped like OCR readings ({"text", "confidence", "box", "source"}),
+    keeping only the digits of each barcode, or [] when nothing decodes.
+    """
+    if _load_decoder() is None:
+        return []
+    gray = to_gray(image)
+    height, width = gray.shape
+
+    hint = device_hint(device) if device else None
+    if hint:
+        name, box = hint
+        x, y, w, h = pad_box(box, width, height, padding=HINT_PADDING)
+        with span("barcode_hint"):
+            candidates = decode_variant(name, gray[y:y + h, x:x + w], gray.shape, origin=(x, y))
+        if candidates:
+            remember(device, candidates)
+            return candidates
+
+    candidates = decode_parallel(gray, first=hint[0] if hint else None)
+    if candidates:
+        remember(device, candidates)
+    return candidates
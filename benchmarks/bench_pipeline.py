@@ -0,0 +1,156 @@
+"""Per-stage benchmark of the capture -> upscale -> OCR -> compare hot path.
+
+Every fixture photo goes through ocr_pipeline.load_image and ocr_label, the
+code FINAL.py runs, followed by the three-way comparison. Stages are timed by
+the tracing spans that code records (decode, numpy conversion, region
+detection, serial mode, resize and the batched EasyOCR call; detect and
+recognize inside it with OCR_EARLY_EXIT=1), so the figures follow whatever the
+pipeline ships. The report lists p50/p90/p99 latency per stage, peak RSS and
+accuracy against the expected serials. Results are saved as JSON so runs from
+different commits can be compared:
+
+    python benchmarks/bench_pipeline.py                      # writes benchmarks/results/<commit>.json
+    python benchmarks/bench_pipeline.py --compare old.json new.json
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ocr_pipeline import compare_results, load_image, ocr_label
+from reader_pool import get_reader_pool
+from tracing import span, use_trace
+
+FIXTURE_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures')
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+# Spans recorded by the pipeline; detect and recognize only with early exit, inside easyocr
+STAGES = ["decode", "to_array", "roi", "serial", "resize", "easyocr", "detect", "recognize", "compare", "total"]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_one(path, serial):
+    """Read one photo the way FINAL.py does and total the time of each span it records.
+
+    total is the wall time of the whole read, so nested spans are not counted twice.
+    """
+    trace = []
+    start = time.perf_counter()
+    with use_trace(trace):
+        image = load_image(path)
+        ocr_text, _ = ocr_label(image)
+        # Every fixture carries the serial line and the part-number line
+        with span("compare"):
+            results, all_match = compare_results([ocr_text] * 3)
+    timings = dict.fromkeys(STAGES, 0.0)
+    for stage, seconds in trace:
+        timings[stage] += seconds
+    timings["total"] = time.perf_counter() - start
+    correct = all_match and results[0] == serial
+    return timings, correct, ocr_text
+
+
+def percentiles(values):
+    values = sorted(values)
+    if len(values) == 1:
+        return {"p50": values[0], "p90": values[0], "p99": values[0]}
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {"p50": statistics.median(values), "p90": cuts[89], "p99": cuts[98]}
+
+
+def run(fixture_dir, repeat, warmup):
+    with open(os.path.join(fixture_dir, 'manifest.csv'), newline='') as f:
+        fixtures = [(os.path.join(fixture_dir, row['image']), row['serial']) for row in csv.DictReader(f)]
+
+    get_reader_pool(size=1)
+    samples = {stage: [] for stage in STAGES}
+    per_image = []
+    for path, serial in fixtures[:warmup]:
+        run_one(path, serial)
+    for path, serial in fixtures:
+        for _ in range(repeat):
+            timings, correct, ocr_text = run_one(path, serial)
+            for stage in STAGES:
+                samples[stage].append(timings[stage])
+        per_image.append({"image": os.path.basename(path), "serial": serial,
+                          "ocr_text": ocr_text, "correct": correct})
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "fixtures": len(fixtures),
+        "repeat": repeat,
+        "stages": {stage: percentiles(values) for stage, values in samples.items()},
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "accuracy": sum(image["correct"] for image in per_image) / len(per_image),
+        "images": per_image,
+    }
+
+
+def print_report(report):
+    print(f"commit {report['commit']}  fixtures {report['fixtures']} x{report['repeat']}  "
+          f"accuracy {report['accuracy']:.0%}  peak RSS {report['peak_rss_mb']:.0f} MB")
+    print(f"{'stage':<10} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}")
+    for stage, row in report["stages"].items():
+        print(f"{stage:<10} {row['p50'] * 1000:>9.1f} {row['p90'] * 1000:>9.1f} {row['p99'] * 1000:>9.1f}")
+
+
+def print_comparison(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{'stage':<10} {old['commit']:>10} {new['commit']:>10} {'change':>8}   (p50 ms)")
+    for stage in STAGES:
+        # Reports from before a stage existed have no row for it
+        if stage not in old["stages"] or stage not in new["stages"]:
+            continue
+        before, after = old["stages"][stage]["p50"] * 1000, new["stages"][stage]["p50"] * 1000
+        change = (after - before) / before if before else 0.0
+        print(f"{stage:<10} {before:>10.1f} {after:>10.1f} {change:>+8.0%}")
+    print(f"{'accuracy':<10} {old['accuracy']:>10.0%} {new['accuracy']:>10.0%}")
+    print(f"{'peak MB':<10} {old['peak_rss_mb']:>10.0f} {new['peak_rss_mb']:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', default=FIXTURE_DIR, help="directory with manifest.csv and label photos")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per photo")
+    parser.add_argument('--warmup', type=int, default=2, help="untimed photos run first")
+    parser.add_argument('--output', help="JSON report path (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="compare two saved reports and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        print_comparison(*args.compare)
+        return
+
+    report = run(args.fixtures, args.repeat, args.warmup)
+    print_report(report)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""CPU cost and match rate of serial mode against the EasyOCR path.
+
+Every fixture photo goes through ocr_pipeline.ocr_label twice, once with serial
+mode off and once with it on. The report gives CPU milliseconds per capture
+(process time, so work on every thread counts), accuracy against the expected
+serials and how often serial mode fell back to EasyOCR.
+
+The checked-in fixtures are rendered with cv2.FONT_HERSHEY_SIMPLEX, the font the
+built-in templates come from, so on them the accuracy and fallback figures only
+show that the templates match the font that drew the photos. For real figures,
+train templates on labelled photos (serial_reader.py train) and point --fixtures
+at a different set of real photos:
+
+    python benchmarks/bench_serial.py [--repeat 3] [--fixtures photos/]
+"""
+import argparse
+import csv
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import ocr_pipeline
+from reader_pool import get_reader_pool
+from serial_reader import get_serial_reader
+from tracing import use_trace
+
+FIXTURE_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures')
+
+
+def run_mode(fixtures, serial_mode, repeat):
+    ocr_pipeline.SERIAL_MODE = serial_mode
+    cpu_ms, correct, fallbacks = [], 0, 0
+    for image, serial in fixtures:
+        for _ in range(repeat):
+            trace = []
+            start = time.process_time()
+            with use_trace(trace):
+                ocr_text, _ = ocr_pipeline.ocr_label(image)
+            cpu_ms.append((time.process_time() - start) * 1000)
+        fallbacks += any(stage == "easyocr" for stage, _ in trace)
+        results, all_match = ocr_pipeline.compare_results([ocr_text] * 3)
+        correct += all_match and results[0] == serial
+    return {"cpu_ms": statistics.median(cpu_ms), "accuracy": correct / len(fixtures),
+            "easyocr_share": fallbacks / len(fixtures)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', default=FIXTURE_DIR)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with open(os.path.join(args.fixtures, 'manifest.csv'), newline='') as f:
+        fixtures = [(np.array(Image.open(os.path.join(args.fixtures, row['image'])).convert('RGB')), row['serial'])
+                    for row in csv.DictReader(f)]
+    get_reader_pool(size=1)
+    source = get_serial_reader().source
+    print(f"serial templates: {source}")
+    if source == "hershey" and os.path.abspath(args.fixtures) == FIXTURE_DIR:
+        print("synthetic only: the fixtures are drawn in the Hershey font the templates come from")
+
+    print(f"{'mode':<8} {'CPU ms':>8} {'accuracy':>9} {'EasyOCR':>8}")
+    reports = {}
+    for name, serial_mode in (("easyocr", False), ("serial", True)):
+        reports[name] = report = run_mode(fixtures, serial_mode, args.repeat)
+        print(f"{name:<8} {report['cpu_ms']:>8.1f} {report['accuracy']:>9.0%} {report['easyocr_share']:>8.0%}")
+    print(f"serial mode is {reports['easyocr']['cpu_ms'] / reports['serial']['cpu_ms']:.1f}x cheaper per capture")
+
+
+if __name__ == "__main__":
+    main()
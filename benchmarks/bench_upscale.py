@@ -0,0 +1,109 @@
+"""Compare the fixed 2x upscale with the adaptive text-height policy.
+
+For every fixture photo this times the resize and the EasyOCR pass under each
+policy and checks whether the expected serial was read. With --regions the
+policies are applied to the roi.find_text_regions crops, which is what
+ocr_pipeline resizes in production; otherwise to the full frame. Run from the
+repository root:
+
+    python benchmarks/bench_upscale.py [--regions] [--repeat 3] [--json results.json]
+"""
+import argparse
+import csv
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reader_pool import get_reader_pool
+from roi import crop_regions, find_text_regions
+from upscaling import upscale_image, upscale_regions
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Each policy returns the resized images that would be OCR'd: the frame, or its region crops
+POLICIES = {
+    "fixed_2x": lambda image, crops: [upscale_image(crop, 2) for crop in crops] if crops else [upscale_image(image, 2)],
+    "adaptive": lambda image, crops: upscale_regions(image, crops) if crops else [upscale_image(image)],
+}
+
+
+def load_fixtures(fixture_dir):
+    with open(os.path.join(fixture_dir, 'manifest.csv'), newline='') as f:
+        for row in csv.DictReader(f):
+            image = np.array(Image.open(os.path.join(fixture_dir, row['image'])).convert('RGB'))
+            yield row['image'], row['serial'], image
+
+
+def run(fixture_dir, repeat, regions=False):
+    fixtures = list(load_fixtures(fixture_dir))
+    reader_pool = get_reader_pool(size=1)
+    results = {name: [] for name in POLICIES}
+
+    for name, policy in POLICIES.items():
+        for image_name, serial, image in fixtures:
+            crops = crop_regions(image, find_text_regions(image)) if regions else []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                resized = policy(image, crops)
+                resize_seconds = time.perf_counter() - start
+
+                start = time.perf_counter()
+                with reader_pool.lease() as reader:
+                    texts = [text for part in resized for _, text, _ in reader.readtext(part, allowlist='0123456789')]
+                ocr_seconds = time.perf_counter() - start
+
+                results[name].append({
+                    "image": image_name,
+                    "scales": [round(part.shape[0] / source.shape[0], 3) for part, source in zip(resized, crops or [image])],
+                    "pixels": sum(int(part.shape[0] * part.shape[1]) for part in resized),
+                    "resize_seconds": resize_seconds,
+                    "ocr_seconds": ocr_seconds,
+                    "correct": any(text.endswith(serial) for text in texts),
+                })
+    return results
+
+
+def summarize(results):
+    summary = {}
+    for name, rows in results.items():
+        totals = [row["resize_seconds"] + row["ocr_seconds"] for row in rows]
+        summary[name] = {
+            "samples": len(rows),
+            "median_seconds": statistics.median(totals),
+            "p90_seconds": statistics.quantiles(totals, n=10)[-1] if len(totals) > 1 else totals[0],
+            "mean_megapixels": statistics.mean(row["pixels"] for row in rows) / 1e6,
+            "accuracy": sum(row["correct"] for row in rows) / len(rows),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', default=FIXTURE_DIR, help="directory with manifest.csv and label photos")
+    parser.add_argument('--regions', action='store_true', help="resize region crops, as production does")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per photo and policy")
+    parser.add_argument('--json', help="also write per-image results and the summary to this file")
+    args = parser.parse_args()
+
+    results = run(args.fixtures, args.repeat, args.regions)
+    summary = summarize(results)
+
+    print(f"{'policy':<10} {'median s':>9} {'p90 s':>8} {'MPix':>6} {'accuracy':>9}")
+    for name, row in summary.items():
+        print(f"{name:<10} {row['median_seconds']:>9.3f} {row['p90_seconds']:>8.3f} "
+              f"{row['mean_megapixels']:>6.2f} {row['accuracy']:>9.0%}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"summary": summary, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
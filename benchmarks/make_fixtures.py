@@ -0,0 +1,69 @@
+"""Generate the synthetic label photos used by the benchmarks.
+
+Each photo is a white label with a 7-digit serial and a longer part number
+printed on it, rendered at phone-camera resolutions with blur, noise and a
+slight rotation. The expected serial for every photo is written to
+manifest.csv next to the images.
+"""
+import csv
+import os
+import random
+
+import cv2
+import numpy as np
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# (width, height, font scale) covering webcam, laptop and phone captures
+RESOLUTIONS = [(640, 480, 1.2), (1280, 720, 2.0), (1920, 1080, 3.0), (3024, 4032, 5.0)]
+
+
+def render_label(serial, part_number, width, height, font_scale, rng):
+    """Render one label photo as an RGB array."""
+    background = rng.randint(90, 140)
+    image = np.full((height, width, 3), background, np.uint8)
+
+    # Light label in the middle of a darker background
+    x0, y0 = int(width * 0.15), int(height * 0.3)
+    x1, y1 = int(width * 0.85), int(height * 0.7)
+    image[y0:y1, x0:x1] = rng.randint(215, 245)
+
+    thickness = max(int(font_scale * 2), 1)
+    text_x = x0 + int((x1 - x0) * 0.08)
+    cv2.putText(image, serial, (text_x, y0 + int((y1 - y0) * 0.4)),
+                cv2.FONT_HERSHEY_SIMPLEX, font_scale, (20, 20, 20), thickness, cv2.LINE_AA)
+    cv2.putText(image, part_number, (text_x, y0 + int((y1 - y0) * 0.8)),
+                cv2.FONT_HERSHEY_SIMPLEX, font_scale * 0.7, (20, 20, 20), thickness, cv2.LINE_AA)
+
+    angle = rng.uniform(-4, 4)
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    image = cv2.warpAffine(image, matrix, (width, height), borderValue=(background,) * 3)
+
+    image = cv2.GaussianBlur(image, (0, 0), rng.uniform(0.5, 1.5))
+    noise = np.random.default_rng(rng.randint(0, 2**31)).normal(0, 3, image.shape)
+    return np.clip(image + noise, 0, 255).astype(np.uint8)
+
+
+def main(count_per_resolution=2, seed=7):
+    rng = random.Random(seed)
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    rows = []
+    for width, height, font_scale in RESOLUTIONS:
+        for i in range(count_per_resolution):
+            serial = ''.join(rng.choice('0123456789') for _ in range(7))
+            part_number = '20' + ''.join(rng.choice('0123456789') for _ in range(3)) + serial
+            image = render_label(serial, part_number, width, height, font_scale, rng)
+            name = f'label_{width}x{height}_{i}.jpg'
+            cv2.imwrite(os.path.join(FIXTURE_DIR, name), cv2.cvtColor(image, cv2.COLOR_RGB2BGR),
+                        [cv2.IMWRITE_JPEG_QUALITY, 80])
+            rows.append({'image': name, 'serial': serial, 'part_number': part_number})
+
+    with open(os.path.join(FIXTURE_DIR, 'manifest.csv'), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['image', 'serial', 'part_number'])
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Wrote {len(rows)} fixtures to {FIXTURE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Accuracy parity check: INT8 ONNX Runtime backend against the EasyOCR reference.
+
+Runs both backends over the fixture photos with the same allowlist and
+filter as perform_ocr, then reports how often their outputs agree, each
+backend's serial accuracy and mean latency. Exits non-zero when the ONNX
+backend reads fewer serials than the reference, less the allowed tolerance.
+
+    python benchmarks/parity_onnx.py [--onnx-dir onnx_models] [--tolerance 0.0]
+"""
+import argparse
+import csv
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ocr_backends import ONNX_MODEL_DIR, create_easyocr_reader, create_onnx_reader
+from ocr_pipeline import OCR_PARAMS
+from upscaling import upscale_image
+
+FIXTURE_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures')
+
+
+def read(reader, image):
+    start = time.perf_counter()
+    results = reader.readtext(image, allowlist=OCR_PARAMS["allowlist"])
+    elapsed = time.perf_counter() - start
+    return [text for _, text, _ in results if len(text) >= OCR_PARAMS["min_length"]], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', default=FIXTURE_DIR)
+    parser.add_argument('--onnx-dir', default=ONNX_MODEL_DIR)
+    parser.add_argument('--tolerance', type=float, default=0.0, help="allowed drop in serial accuracy")
+    args = parser.parse_args()
+
+    readers = {
+        "easyocr": create_easyocr_reader(['en']),
+        "onnx": create_onnx_reader(['en'], args.onnx_dir),
+    }
+    correct = dict.fromkeys(readers, 0)
+    latencies = {name: [] for name in readers}
+    agree = 0
+
+    with open(os.path.join(args.fixtures, 'manifest.csv'), newline='') as f:
+        fixtures = list(csv.DictReader(f))
+    for row in fixtures:
+        image = upscale_image(np.array(Image.open(os.path.join(args.fixtures, row['image'])).convert('RGB')))
+        outputs = {}
+        for name, reader in readers.items():
+            outputs[name], elapsed = read(reader, image)
+            latencies[name].append(elapsed)
+            correct[name] += any(text.endswith(row['serial']) for text in outputs[name])
+        agree += outputs["easyocr"] == outputs["onnx"]
+        if outputs["easyocr"] != outputs["onnx"]:
+            print(f"{row['image']}: easyocr {outputs['easyocr']} onnx {outputs['onnx']}")
+
+    count = len(fixtures)
+    print(f"identical output on {agree}/{count} photos")
+    for name in readers:
+        print(f"{name:<8} accuracy {correct[name] / count:.0%}  mean {statistics.mean(latencies[name]):.3f}s")
+
+    if correct["onnx"] / count < correct["easyocr"] / count - args.tolerance:
+        sys.exit("ONNX backend is less accurate than the EasyOCR reference.")
+
+
+if __name__ == "__main__":
+    main()
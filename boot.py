@@ -0,0 +1,108 @@
+"""Boot-time warmup and readiness signal for the OCR station.
+
+warm_up() does the slow, once-per-process work (importing torch via easyocr,
+loading the reader pool, authorizing the Sheets client) so the first operator
+does not pay for it. The health server answers /healthz as soon as the
+process is up and /ready with 200 only once warm_up() has finished, so a load
+balancer can hold traffic until then.
+"""
+import importlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HEALTH_PORT = os.getenv('OCR_HEALTH_PORT', '8502')
+
+_ready = threading.Event()
+# Set once warm_up() has run, whether or not it succeeded; a failed warm-up is not retried
+_warmed = threading.Event()
+_warm_lock = threading.Lock()
+_state = {"ready": False, "started": time.time(), "phases": {}, "errors": {}}
+
+
+def _phase(name, func):
+    start = time.perf_counter()
+    try:
+        func()
+    except Exception as exc:
+        _state["errors"][name] = repr(exc)
+    _state["phases"][name] = round(time.perf_counter() - start, 3)
+
+
+def warm_up():
+    """Import heavy modules and load models once per process; returns the per-phase timings in seconds.
+
+    Failures are recorded in status()["errors"] and is_ready() stays False; later
+    calls return straight away instead of repeating a warm-up that already failed.
+    """
+    with _warm_lock:
+        if not _warmed.is_set():
+            try:
+                _warm_up()
+            finally:
+                _warmed.set()
+    return dict(_state["phases"])
+
+
+def _warm_up():
+    from reader_pool import get_reader_pool
+    from barcode import _load_decoder
+    from serial_reader import SERIAL_MODE, get_serial_reader
+
+    _phase("import_easyocr", lambda: importlib.import_module('easyocr'))
+    _phase("import_pipeline", lambda: importlib.import_module('ocr_pipeline'))
+    _phase("load_readers", get_reader_pool)
+    if SERIAL_MODE:
+        _phase("serial_templates", get_serial_reader)
+    _phase("barcode_decoder", _load_decoder)
+
+    def connect_sheets():
+        from sheets_client import get_sheets_client
+        from sheets_queue import resume_spooled_uploads
+        get_sheets_client()
+        resume_spooled_uploads()
+
+    # A Sheets failure does not block readiness; rows are spooled until it recovers
+    _phase("sheets_client", connect_sheets)
+
+    if "load_readers" not in _state["errors"]:
+        _state["ready"] = True
+        _ready.set()
+    _state["cold_start_seconds"] = round(time.time() - _state["started"], 3)
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def status():
+    return dict(_state)
+
+
+class _HealthHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/healthz':
+            code = 200
+        elif self.path == '/ready':
+            code = 200 if is_ready() else 503
+        else:
+            self.send_error(404)
+            return
+        payload = json.dumps(status()).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_health_server(port=HEALTH_PORT, host='0.0.0.0'):
+    """Serve /healthz and /ready on a background thread."""
+    server = ThreadingHTTPServer((host, int(port)), _HealthHandler)
+    threading.Thread(target=server.serve_forever, name="health", daemon=True).start()
+    return server
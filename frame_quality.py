@@ -0,0 +1,88 @@
+"""Cheap per-frame measurements used to decide whether a frame is worth reading.
+
+Everything runs on a small grayscale copy of the raw frame, before any
+upscaling, so it costs about a millisecond even for phone-camera resolutions.
+check_frame() turns the measurements into a reason to reject the frame:
+blur (Laplacian variance), glare (fraction of clipped pixels) or bad
+exposure (the brightness histogram is too dark, too bright or too flat).
+"""
+import os
+
+import cv2
+import numpy as np
+
+from roi import to_gray
+
+# Frames are scored on a copy no wider than this
+SCORE_WIDTH = 480
+# Laplacian variance of the scoring copy below which a frame is too blurred to read
+MIN_SHARPNESS = float(os.getenv('OCR_MIN_SHARPNESS', '25'))
+# Fraction of pixels at or above GLARE_LEVEL that counts as glare across the label
+MAX_GLARE = float(os.getenv('OCR_MAX_GLARE', '0.05'))
+GLARE_LEVEL = 250
+# Mean brightness outside this range is under- or overexposed
+EXPOSURE_RANGE = (40, 220)
+# Spread between the 5th and 95th brightness percentiles below which digits cannot stand out
+MIN_CONTRAST = 40
+
+
+def small_gray(image, width=SCORE_WIDTH):
+    """Return a grayscale copy of image shrunk to at most width pixels wide."""
+    step = image.shape[1] // (2 * width)
+    if step > 1:
+        # A strided view skips most pixels before any conversion; the area resize below smooths the rest
+        image = image[::step, ::step]
+    gray = to_gray(image)
+    height, full_width = gray.shape[:2]
+    if full_width <= width:
+        return gray
+    return cv2.resize(gray, (width, int(height * width / full_width)), interpolation=cv2.INTER_AREA)
+
+
+def sharpness(gray):
+    """Variance of the Laplacian; low values mean a blurred frame."""
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def motion(previous, gray):
+    """Mean absolute difference from the previous frame in grey levels, or None without one."""
+    if previous is None or previous.shape != gray.shape:
+        return None
+    return float(np.mean(cv2.absdiff(previous, gray)))
+
+
+def measure(gray):
+    """Return the quality measurements of a frame's small grayscale copy."""
+    histogram = np.bincount(gray.ravel(), minlength=256)
+    cumulative = np.cumsum(histogram) / gray.size
+    low, high = np.searchsorted(cumulative, 0.05), np.searchsorted(cumulative, 0.95)
+    return {
+        "sharpness": sharpness(gray),
+        "glare": float(histogram[GLARE_LEVEL:].sum() / gray.size),
+        "brightness": float(np.dot(np.arange(256), histogram) / gray.size),
+        "contrast": int(high - low),
+    }
+
+
+def check_frame(image):
+    """Return (problem, measurements) for a raw frame; problem is None when it is worth reading.
+
+    problem is one of "blurred", "glare", "too_dark", "too_bright" or "low_contrast".
+    """
+    return check_gray(small_gray(image))
+
+
+def check_gray(gray):
+    """check_frame() for a frame already reduced with small_gray()."""
+    quality = measure(gray)
+    if quality["brightness"] < EXPOSURE_RANGE[0]:
+        return "too_dark", quality
+    if quality["brightness"] > EXPOSURE_RANGE[1]:
+        return "too_bright", quality
+    if quality["glare"] > MAX_GLARE:
+        return "glare", quality
+    if quality["contrast"] < MIN_CONTRAST:
+        return "low_contrast", quality
+    if quality["sharpness"] < MIN_SHARPNESS:
+        return "blurred", quality
+    return None, quality
@@ -0,0 +1,95 @@
+"""A bounded, process-wide store for the encoded images sessions display.
+
+Sessions keep only a LabelRecord (see label_record.py) with the hash of each
+capture; previews, overlays and original photos live here, shared by every
+session, until they expire after OCR_IMAGE_TTL seconds or the store grows past
+OCR_IMAGE_STORE_MB and evicts the least recently used. A session whose image
+has gone simply shows it as expired.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Total size of the stored images before the least recently used is evicted
+IMAGE_STORE_BYTES = int(float(os.getenv('OCR_IMAGE_STORE_MB', '256')) * 1024 * 1024)
+# Seconds an image is kept after it was stored
+IMAGE_TTL = float(os.getenv('OCR_IMAGE_TTL', '900'))
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class ImageStore:
+    """A thread-safe LRU of bytes values bounded by total size, with a per-entry TTL."""
+
+    def __init__(self, max_bytes=IMAGE_STORE_BYTES, ttl=IMAGE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _drop(self, key):
+        _, data = self._entries.pop(key)
+        self.bytes -= len(data)
+
+    def _expire(self, now):
+        expired = [key for key, (expires, _) in self._entries.items() if expires < now]
+        for key in expired:
+            self._drop(key)
+        self.expirations += len(expired)
+
+    def put(self, key, data):
+        """Store data under key, dropping expired entries and evicting the oldest to stay within max_bytes."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (now + self.ttl, data)
+            self.bytes += len(data)
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get(self, key):
+        """Return the bytes stored under key, or None when missing, evicted or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def discard(self, keys):
+        """Remove keys that are no longer needed, such as a finished label's images."""
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._drop(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def get_image_store():
+    """Return the process-wide image store."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ImageStore()
+    return _store
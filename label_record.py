@@ -0,0 +1,110 @@
+"""The one compact record a Streamlit session keeps about the label it is verifying.
+
+A LabelRecord holds the OCR outcome of each capture (candidates, best
+confidence, regions read and OCR time) and a hash of the photo, never the photo
+itself: previews and originals live in the shared image_store under that hash.
+While a capture is being read its Future is parked in the record and replaced
+by the outcome as soon as it finishes, so nothing large outlives the read.
+"""
+import hashlib
+import sys
+from collections.abc import Collection, Mapping
+
+import numpy as np
+
+CAPTURES = 3
+# Image store entries kept for each capture, under "<hash>/<kind>"
+IMAGE_KINDS = ("preview", "original", "overlay")
+
+
+def capture_hash(data):
+    """Hash a capture's encoded bytes; the key of its images in the image store."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class LabelRecord:
+    """Per-label session state: device, and per capture its hash, candidates, confidence and timing."""
+
+    __slots__ = ("device", "image_hashes", "candidates", "confidences", "regions", "timings", "errors", "pending")
+
+    def __init__(self, device=None, captures=CAPTURES):
+        self.device = device
+        self.image_hashes = [None] * captures
+        # Each capture's candidate dicts; None until it has been read
+        self.candidates = [None] * captures
+        self.confidences = [None] * captures
+        # Number of label regions OCR read; 0 means it fell back to the full frame
+        self.regions = [None] * captures
+        self.timings = [None] * captures
+        self.errors = [None] * captures
+        self.pending = [None] * captures
+
+    def captured(self):
+        """Number of captures taken so far."""
+        return sum(image_hash is not None for image_hash in self.image_hashes)
+
+    def submit(self, index, image_hash, future):
+        """Record a capture whose OCR is running in future, discarding any earlier outcome."""
+        self.image_hashes[index] = image_hash
+        self.candidates[index] = self.confidences[index] = self.regions[index] = None
+        self.timings[index] = self.errors[index] = None
+        self.pending[index] = future
+
+    def collect(self):
+        """Move the outcome of every finished read into the record and drop its Future."""
+        for index, future in enumerate(self.pending):
+            if future is None or not future.done():
+                continue
+            try:
+                candidates, regions, seconds = future.result()
+            except Exception as exc:
+                # A failed read counts as no numbers; the error is shown with the capture
+                candidates, regions, seconds = [], 0, None
+                self.errors[index] = str(exc)
+            self.candidates[index] = candidates
+            self.confidences[index] = max((candidate["confidence"] for candidate in candidates), default=0.0)
+            self.regions[index] = regions
+            self.timings[index] = seconds
+            self.pending[index] = None
+
+    def running(self):
+        """Futures of the captures still being read."""
+        return [future for future in self.pending if future is not None]
+
+    def complete(self):
+        """True when every capture has been read."""
+        return all(candidates is not None for candidates in self.candidates)
+
+    def image_keys(self):
+        """Image store keys of every capture of this label."""
+        return [f"{image_hash}/{kind}" for image_hash in self.image_hashes if image_hash for kind in IMAGE_KINDS]
+
+
+def deep_size(value, seen=None):
+    """Approximate bytes held by value and everything it references, counting arrays by their buffers."""
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, np.ndarray):
+        return sys.getsizeof(value) + (value.nbytes if value.base is None else 0)
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(value, Mapping):
+        return size + sum(deep_size(key, seen) + deep_size(item, seen) for key, item in value.items())
+    # Any sized container (lists, sets, deques...); plain iterators are not walked, that would consume them
+    if isinstance(value, Collection):
+        return size + sum(deep_size(item, seen) for item in value)
+    for slot in getattr(type(value), '__slots__', ()):
+        size += deep_size(getattr(value, slot, None), seen)
+    if hasattr(value, '__dict__'):
+        size += deep_size(vars(value), seen)
+    return size
+
+
+def session_memory(state):
+    """Return {key: approximate bytes} for a mapping of session state, largest first."""
+    sizes = {key: deep_size(state[key]) for key in state.keys()}
+    return dict(sorted(sizes.items(), key=lambda item: item[1], reverse=True))
@@ -0,0 +1,161 @@
+"""Local, read-only store for the EasyOCR model files.
+
+Set OCR_MODEL_DIR to a directory prepared at image build time with
+
+    python model_store.py prepare /opt/ocr-models
+
+and readers load the pinned CRAFT detector and English recognizer from that
+path with downloads disabled. prepare checks each file against the MD5 that
+EasyOCR publishes and writes a SHA-256 manifest. The ONNX export
+(ocr_backends.py) adds its files to the manifest of the directory it writes to.
+Every process start verifies the manifest once, before any weights are loaded.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import urllib.request
+import zipfile
+from contextlib import contextmanager
+
+MODEL_DIR = os.getenv('OCR_MODEL_DIR')
+# Load weights through mmap so processes on one node read them from the shared page cache
+MODEL_MMAP = os.getenv('OCR_MODEL_MMAP', '0') == '1'
+MANIFEST_NAME = 'models.sha256.json'
+
+# The files easyocr.Reader(['en']) loads, pinned to the checksums in EasyOCR's config
+PINNED_MODELS = {
+    'craft_mlt_25k.pth': {
+        'url': 'https://github.com/JaidedAI/EasyOCR/releases/download/pre-v1.1.6/craft_mlt_25k.zip',
+        'md5': '2f8227d2def4037cdb3b34389dcf9ec1',
+    },
+    'english_g2.pth': {
+        'url': 'https://github.com/JaidedAI/EasyOCR/releases/download/v1.3/english_g2.zip',
+        'md5': '5864788e1821be9e454ec108d61b887d',
+    },
+}
+
+
+class ModelStoreError(RuntimeError):
+    """The model store is missing a file or a file failed its checksum."""
+
+
+def file_digest(path, algorithm):
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(model_dir):
+    """Return the store's {filename: sha256} manifest, or {} when there is none yet."""
+    try:
+        with open(os.path.join(model_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def add_to_manifest(model_dir, filenames):
+    """Record the SHA-256 of filenames in model_dir's manifest, keeping the entries already there."""
+    manifest = read_manifest(model_dir)
+    for filename in filenames:
+        manifest[filename] = file_digest(os.path.join(model_dir, filename), 'sha256')
+    with open(os.path.join(model_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def verify_store(model_dir=MODEL_DIR, filenames=tuple(PINNED_MODELS)):
+    """Check model files (by default the pinned EasyOCR ones) against the store's SHA-256 manifest."""
+    manifest = read_manifest(model_dir)
+    if not manifest:
+        raise ModelStoreError(f"{os.path.join(model_dir, MANIFEST_NAME)} is missing; "
+                              f"run `python model_store.py prepare {model_dir}`.")
+
+    for filename in filenames:
+        path = os.path.join(model_dir, filename)
+        if not os.path.isfile(path):
+            raise ModelStoreError(f"Model file {path} is missing.")
+        if filename not in manifest or file_digest(path, 'sha256') != manifest[filename]:
+            raise ModelStoreError(f"Model file {path} does not match its pinned checksum.")
+
+
+def reader_kwargs(model_dir=MODEL_DIR):
+    """Return easyocr.Reader arguments that load from the store without downloading."""
+    if not model_dir:
+        return {}
+    return {
+        "model_storage_directory": model_dir,
+        # EasyOCR creates this directory if missing; pointing it at the store keeps $HOME untouched
+        "user_network_directory": model_dir,
+        "download_enabled": False,
+    }
+
+
+@contextmanager
+def mmap_weights(enabled=MODEL_MMAP):
+    """Make torch.load memory-map checkpoint files while readers are being built."""
+    if not enabled:
+        yield
+        return
+    import torch
+
+    original_load = torch.load
+
+    def load(*args, **kwargs):
+        try:
+            return original_load(*args, **{'mmap': True, **kwargs})
+        except (RuntimeError, TypeError):
+            # Legacy-format checkpoints (and torch < 2.1) cannot be memory-mapped
+            return original_load(*args, **kwargs)
+
+    torch.load = load
+    try:
+        yield
+    finally:
+        torch.load = original_load
+
+
+def prepare_store(model_dir):
+    """Download any missing pinned models into model_dir, check their MD5 and write the manifest."""
+    os.makedirs(model_dir, exist_ok=True)
+    for filename, pin in PINNED_MODELS.items():
+        path = os.path.join(model_dir, filename)
+        if not os.path.isfile(path):
+            print(f"Downloading {pin['url']}")
+            with tempfile.TemporaryDirectory() as tmp:
+                archive = os.path.join(tmp, 'model.zip')
+                urllib.request.urlretrieve(pin['url'], archive)
+                with zipfile.ZipFile(archive) as zf:
+                    zf.extract(filename, tmp)
+                shutil.move(os.path.join(tmp, filename), path)
+        if file_digest(path, 'md5') != pin['md5']:
+            raise ModelStoreError(f"{path} does not match EasyOCR's published MD5 {pin['md5']}.")
+    add_to_manifest(model_dir, PINNED_MODELS)
+    print(f"Model store ready in {model_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['prepare', 'verify'])
+    parser.add_argument('model_dir', nargs='?', default=MODEL_DIR)
+    args = parser.parse_args()
+    if not args.model_dir:
+        parser.error("Give a model directory or set OCR_MODEL_DIR.")
+
+    try:
+        if args.command == 'prepare':
+            prepare_store(args.model_dir)
+        else:
+            verify_store(args.model_dir)
+            print(f"{args.model_dir} OK")
+    except ModelStoreError as exc:
+        sys.exit(str(exc))
+
+
+if __name__ == "__main__":
+    main()
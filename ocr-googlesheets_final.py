@@ -2,30 +2,10 @@ import streamlit as st
 import cv2
 import numpy as np
 from PIL import Image
-import easyocr
+from reader_pool import get_reader_pool
 from datetime import datetime
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import os
 import pytz
-from dotenv import load_dotenv
-
-# Load environment variables from the .env file
-load_dotenv()
-# Now access the environment variables
-project_id = os.getenv('GCP_PROJECT_ID')
-private_key_id = os.getenv('GCP_PRIVATE_KEY_ID')
-private_key = os.getenv('GCP_PRIVATE_KEY')
-client_email = os.getenv('GCP_CLIENT_EMAIL')
-client_id = os.getenv('GCP_CLIENT_ID')
-client_x509_cert_url = os.getenv('GCP_CLIENT_X509_CERT_URL')
-# print(os.getenv('GCP_PROJECT_ID'))
-# print(os.getenv('GCP_PRIVATE_KEY_ID'))
-# print(os.getenv('GCP_PRIVATE_KEY'))
-# print(os.getenv('GCP_CLIENT_EMAIL'))
-# print(os.getenv('GCP_CLIENT_ID'))
-# print(os.getenv('GCP_CLIENT_X509_CERT_URL'))
-
+from sheets_queue import get_write_queue, resume_spooled_uploads
 
 def upscale_image(image, scale_factor=2):
     height, width = image.shape[:2]
@@ -33,39 +13,13 @@ def upscale_image(image, scale_factor=2):
     return cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
 
 def perform_ocr(image):
-    reader = easyocr.Reader(['en'])
-    results = reader.readtext(image, allowlist='0123456789')
+    with get_reader_pool().lease() as reader:
+        results = reader.readtext(image, allowlist='0123456789')
     ocr_text = [result[1] for result in results if len(result[1]) >= 4]
     return ocr_text
 
 
-def connect_to_google_sheets(sheet_name):
-    required_vars = [
-        "GCP_PROJECT_ID", "GCP_PRIVATE_KEY_ID", "GCP_PRIVATE_KEY",
-        "GCP_CLIENT_EMAIL", "GCP_CLIENT_ID", "GCP_CLIENT_X509_CERT_URL"
-    ]
-    
-    for var in required_vars:
-        if os.getenv(var) is None:
-            raise ValueError(f"Environment variable {var} is not set.")
-    
-    creds_json = {
-        "type": "service_account",
-        "project_id": project_id,
-        "private_key_id": private_key_id,
-        "private_key": private_key,
-        "client_email": client_email,
-        "client_id": client_id,
-        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-        "token_uri": "https://oauth2.googleapis.com/token",
-        "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-        "client_x509_cert_url": client_x509_cert_url
-    }
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_json)
-    client = gspread.authorize(creds)
-    return client.open(sheet_name).sheet1
-
-def save_to_google_sheets(sheet, results, all_match):
+def save_to_google_sheets(sheet_name, results, all_match):
     """Save the comparison results to Google Sheets with match status."""
     # Convert UTC time to Japan Standard Time (JST)
     utc_now = datetime.now(pytz.utc)
@@ -77,9 +31,9 @@ def save_to_google_sheets(sheet, results, all_match):
         st.session_state.saved = False
 
     if not st.session_state.saved:
-        # Append results with match status to Google Sheets
+        # Spool results with match status to Google Sheets
         match_status = "匹敵 (Match)" if all_match else "一致しない (No Match)"
-        sheet.append_row(results + [match_status, timestamp])
+        get_write_queue(sheet_name).put(results + [match_status, timestamp])
         st.session_state.saved = True
 
 
@@ -87,6 +41,9 @@ def save_to_google_sheets(sheet, results, all_match):
 def main():
     st.title("シンワアクティブ SHINWA ACTIVE")
 
+    # Load the shared OCR readers once per process, before the first capture
+    get_reader_pool()
+
     if 'step' not in st.session_state:
         st.session_state.step = 1
     if 'ocr_results' not in st.session_state:
@@ -94,7 +51,9 @@ def main():
     if 'saved' not in st.session_state:
         st.session_state.saved = False
 
-    sheet = connect_to_google_sheets("ocr_data")
+    # Rows are spooled locally and uploaded in the background, so Sheets is not contacted here
+    sheet_name = "ocr_data"
+    resume_spooled_uploads()
 
     if st.session_state.step <= 3:
         st.write(f"Step {st.session_state.step}: 「画像をキャプチャしてください」Capture Image {st.session_state.step}")
@@ -145,7 +104,7 @@ def main():
 
         if not st.session_state.saved:
             # Save results with match status
-            save_to_google_sheets(sheet, results, all_match)
+            save_to_google_sheets(sheet_name, results, all_match)
             st.write(f"OCR結果がGoogle Sheetsに保存されました Results saved to Google Sheets")
 
         if st.button("最初からやり直してください。Start Over"):
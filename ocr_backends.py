@@ -0,0 +1,208 @@
+"""Pluggable OCR backends for the reader pool.
+
+OCR_BACKEND selects what get_reader_pool() builds:
+
+- easyocr (default): the stock PyTorch easyocr.Reader, kept as the reference.
+- onnx: the same EasyOCR pre- and post-processing, with the CRAFT detector and
+  the English recognizer running as INT8-quantized ONNX Runtime sessions.
+
+onnxruntime is optional (requirements-onnx.txt) and imported only by the onnx
+backend. Create the ONNX models once, best into the model store, with
+
+    python ocr_backends.py export /opt/ocr-models
+
+which also records their checksums in the store's manifest, and check them
+against the reference with benchmarks/parity_onnx.py.
+"""
+import argparse
+import json
+import os
+
+from model_store import (MODEL_DIR, PINNED_MODELS, add_to_manifest, mmap_weights, read_manifest, reader_kwargs,
+                         verify_store)
+
+OCR_BACKEND = os.getenv('OCR_BACKEND', 'easyocr')
+ONNX_MODEL_DIR = os.getenv('OCR_ONNX_DIR', MODEL_DIR or 'onnx_models')
+# Intra-op threads per reader; 0 leaves the runtime default (all cores)
+OCR_THREADS = int(os.getenv('OCR_THREADS', '0'))
+
+DETECTOR_FILE = 'craft_int8.onnx'
+RECOGNIZER_FILE = 'english_g2_int8.onnx'
+CHARSET_FILE = 'charset.json'
+ONNX_FILES = (DETECTOR_FILE, RECOGNIZER_FILE, CHARSET_FILE)
+
+
+def verify_backend(backend=None):
+    """Check the configured backend's model files against their manifest; once per process, not per reader.
+
+    Raises model_store.ModelStoreError on a missing or corrupted file.
+    """
+    backend = backend or OCR_BACKEND
+    if backend == 'onnx':
+        verify_store(ONNX_MODEL_DIR, ONNX_FILES)
+    elif MODEL_DIR:
+        verify_store(MODEL_DIR)
+
+
+def backend_fingerprint(backend=None):
+    """Return the backend's name and the manifest checksums of its model files.
+
+    Part of the OCR result cache key, so results from one backend or model version
+    are never served for another. Files with no manifest entry count as None.
+    """
+    backend = backend or OCR_BACKEND
+    if backend == 'onnx':
+        manifest, filenames = read_manifest(ONNX_MODEL_DIR), ONNX_FILES
+    else:
+        manifest, filenames = (read_manifest(MODEL_DIR) if MODEL_DIR else {}), tuple(PINNED_MODELS)
+    return {"backend": backend, "models": {filename: manifest.get(filename) for filename in filenames}}
+
+
+def create_reader(languages, backend=None):
+    """Build one reader for the pool using the configured backend."""
+    backend = backend or OCR_BACKEND
+    if backend == 'easyocr':
+        return create_easyocr_reader(languages)
+    if backend == 'onnx':
+        return create_onnx_reader(languages)
+    raise ValueError(f"Unknown OCR backend {backend!r}; use 'easyocr' or 'onnx'.")
+
+
+def create_easyocr_reader(languages, **kwargs):
+    """The reference PyTorch reader."""
+    # Imported here because easyocr pulls in torch; see boot.warm_up()
+    import easyocr
+    import torch
+
+    if OCR_THREADS:
+        torch.set_num_threads(OCR_THREADS)
+    with mmap_weights():
+        return easyocr.Reader(languages, **{**reader_kwargs(), **kwargs})
+
+
+class _OnnxDetector:
+    """Stands in for EasyOCR's CRAFT module inside detection.test_net."""
+
+    def __init__(self, session):
+        self.session = session
+
+    def __call__(self, x):
+        import torch
+
+        y, feature = self.session.run(None, {'input': x.cpu().numpy()})
+        return torch.from_numpy(y), torch.from_numpy(feature)
+
+    def eval(self):
+        return self
+
+
+class _OnnxRecognizer:
+    """Stands in for EasyOCR's recognizer module inside recognition.recognizer_predict."""
+
+    def __init__(self, session):
+        self.session = session
+
+    def __call__(self, image, text=None):
+        import torch
+
+        return torch.from_numpy(self.session.run(None, {'input': image.cpu().numpy()})[0])
+
+    def eval(self):
+        return self
+
+
+def _session(path):
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        raise RuntimeError("OCR_BACKEND=onnx needs onnxruntime; pip install -r requirements-onnx.txt")
+
+    options = ort.SessionOptions()
+    if OCR_THREADS:
+        options.intra_op_num_threads = OCR_THREADS
+    options.inter_op_num_threads = 1
+    return ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+
+def create_onnx_reader(languages, model_dir=ONNX_MODEL_DIR):
+    """An easyocr.Reader whose detector and recognizer run on ONNX Runtime."""
+    import easyocr
+    from easyocr.detection import get_textbox
+    from easyocr.utils import CTCLabelConverter
+
+    with open(os.path.join(model_dir, CHARSET_FILE)) as f:
+        charset = json.load(f)
+
+    # No PyTorch weights are loaded; only the language tables and helpers are set up
+    reader = easyocr.Reader(languages, gpu=False, detector=False, recognizer=False, **reader_kwargs())
+    if reader.character != charset["characters"]:
+        raise ValueError(f"{model_dir} was exported for a different character set than {languages}.")
+    reader.get_textbox = get_textbox
+    reader.detector = _OnnxDetector(_session(os.path.join(model_dir, DETECTOR_FILE)))
+    reader.recognizer = _OnnxRecognizer(_session(os.path.join(model_dir, RECOGNIZER_FILE)))
+    reader.converter = CTCLabelConverter(reader.character)
+    return reader
+
+
+def _recognizer_for_export(model):
+    """Wrap the recognizer so the exported graph takes only the image tensor."""
+    import torch
+
+    class ImageOnly(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, image):
+            return self.model(image, None)
+
+    return ImageOnly()
+
+
+def export_onnx(out_dir, languages=('en',)):
+    """Export the reference reader's networks to ONNX and quantize their weights to INT8."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(out_dir, exist_ok=True)
+    verify_backend('easyocr')
+    # Export from float weights; EasyOCR's own torch quantization does not export
+    reader = create_easyocr_reader(list(languages), gpu=False, quantize=False)
+
+    detector_fp32 = os.path.join(out_dir, 'craft_fp32.onnx')
+    torch.onnx.export(
+        reader.detector.eval(), torch.randn(1, 3, 640, 640), detector_fp32,
+        input_names=['input'], output_names=['output', 'feature'], opset_version=17,
+        dynamic_axes={'input': {0: 'batch', 2: 'height', 3: 'width'},
+                      'output': {0: 'batch', 1: 'out_height', 2: 'out_width'},
+                      'feature': {0: 'batch', 2: 'feat_height', 3: 'feat_width'}},
+    )
+
+    recognizer_fp32 = os.path.join(out_dir, 'english_g2_fp32.onnx')
+    torch.onnx.export(
+        _recognizer_for_export(reader.recognizer.eval()), torch.randn(1, 1, 64, 256), recognizer_fp32,
+        input_names=['input'], output_names=['output'], opset_version=17,
+        dynamic_axes={'input': {0: 'batch', 3: 'width'}, 'output': {0: 'batch', 1: 'steps'}},
+    )
+
+    for fp32_path, int8_name in ((detector_fp32, DETECTOR_FILE), (recognizer_fp32, RECOGNIZER_FILE)):
+        quantize_dynamic(fp32_path, os.path.join(out_dir, int8_name), weight_type=QuantType.QInt8)
+        os.remove(fp32_path)
+
+    with open(os.path.join(out_dir, CHARSET_FILE), 'w') as f:
+        json.dump({"languages": list(languages), "characters": reader.character}, f, ensure_ascii=False)
+    # The reader pool refuses to load files that are not in the manifest
+    add_to_manifest(out_dir, ONNX_FILES)
+    print(f"Exported INT8 ONNX models to {out_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['export'])
+    parser.add_argument('out_dir', nargs='?', default=ONNX_MODEL_DIR)
+    args = parser.parse_args()
+    export_onnx(args.out_dir)
+
+
+if __name__ == "__main__":
+    main()
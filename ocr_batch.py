@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+
+from reader_pool import get_reader_pool
+from tracing import span
+
+# Recognizer batch size and DataLoader workers for batched readtext calls
+OCR_BATCH_SIZE = int(os.getenv('OCR_BATCH_SIZE', '8'))
+OCR_WORKERS = int(os.getenv('OCR_WORKERS', '0'))
+
+
+def pad_to_shape(image, height, width, fill=255):
+    """Pad an image on the bottom and right so batched detection sees equal shapes."""
+    if image.shape[:2] == (height, width):
+        return image
+    padded = np.full((height, width) + image.shape[2:], fill, dtype=image.dtype)
+    padded[:image.shape[0], :image.shape[1]] = image
+    return padded
+
+
+def as_rgb(image):
+    """Give grayscale and RGBA inputs the three channels EasyOCR's batch path expects."""
+    if image.ndim == 2:
+        return np.repeat(image[:, :, None], 3, axis=2)
+    if image.shape[2] == 4:
+        return image[:, :, :3]
+    return image
+
+
+def readtext_candidates(results, min_length=4, scale=1.0):
+    """Turn readtext (bbox, text, confidence) triples into candidate dicts.
+
+    Boxes become [x, y, w, h], divided by the upscale factor of the image that was read.
+    """
+    candidates = []
+    for points, text, confidence in results:
+        if len(text) < min_length:
+            continue
+        xs = [point[0] / scale for point in points]
+        ys = [point[1] / scale for point in points]
+        candidates.append({
+            "text": text,
+            "confidence": float(confidence),
+            "box": [int(min(xs)), int(min(ys)), int(max(xs) - min(xs)), int(max(ys) - min(ys))],
+        })
+    return candidates
+
+
+def perform_ocr_batch(images, batch_size=OCR_BATCH_SIZE, workers=OCR_WORKERS, min_length=4):
+    """OCR several images with one batched detector and recognizer call.
+
+    Returns one candidate list per input image, in the same shape perform_ocr returns,
+    with boxes in each image's own coordinates.
+    """
+    if not images:
+        return []
+    images = [as_rgb(image) for image in images]
+    # Padding keeps the original pixel scale, unlike readtext_batched's own resize
+    height = max(image.shape[0] for image in images)
+    width = max(image.shape[1] for image in images)
+    padded = [pad_to_shape(image, height, width) for image in images]
+
+    with get_reader_pool().lease() as reader, span("easyocr"):
+        batched = reader.readtext_batched(padded, batch_size=batch_size, workers=workers,
+                                          allowlist='0123456789')
+    return [readtext_candidates(results, min_length) for results in batched]
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Number of OCR results kept in memory before the least recently used is evicted
+OCR_CACHE_SIZE = int(os.getenv('OCR_CACHE_SIZE', '1024'))
+# Optional directory for a second, persistent cache tier
+OCR_CACHE_DIR = os.getenv('OCR_CACHE_DIR')
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def image_key(image, **params):
+    """Hash the decoded pixels together with the preprocessing parameters."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.shape}|{image.dtype}|".encode())
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    digest.update(memoryview(image if image.flags.c_contiguous else image.copy()).cast('B'))
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """A thread-safe LRU cache of OCR results with an optional on-disk tier."""
+
+    def __init__(self, max_entries=OCR_CACHE_SIZE, cache_dir=OCR_CACHE_DIR):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Return the cached value for key, or None."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        if self.cache_dir:
+            try:
+                with open(self._disk_path(key)) as f:
+                    value = json.load(f)
+            except (OSError, ValueError):
+                pass
+            else:
+                self._store(key, value)
+                with self._lock:
+                    self.disk_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, key, value):
+        """Cache a JSON-serializable value under key."""
+        self._store(key, value)
+        if self.cache_dir:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so a crash never leaves a half-written entry
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+
+def get_ocr_cache():
+    """Return the process-wide OCR result cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = OCRCache()
+    return _cache
@@ -0,0 +1,85 @@
+"""Early-exit recognition: read the most serial-like text boxes first and stop at a confident serial.
+
+readtext() recognizes every box the detector finds, but a capture only needs
+one serial. With OCR_EARLY_EXIT=1, detected boxes (and ROI crops) are ranked
+by how much they look like the serial line: tall text, a 7-digit aspect
+ratio and a position near the middle of the frame. They are then recognized
+one at a time, most likely first, until a reading passes the length and
+confidence thresholds.
+"""
+import math
+import os
+
+from tracing import span
+
+EARLY_EXIT = os.getenv('OCR_EARLY_EXIT', '0') == '1'
+# A reading this confident with at least SERIAL_LENGTH digits ends the capture
+EARLY_EXIT_CONFIDENCE = float(os.getenv('OCR_EARLY_EXIT_CONFIDENCE', '0.6'))
+SERIAL_LENGTH = 7
+# Width / height of a printed 7-digit serial, with a little padding
+SERIAL_ASPECT = 4.5
+
+
+def serial_likelihood(box, frame_width, frame_height, tallest):
+    """Score an (x, y, w, h) box by how much it looks like the serial line, between 0 and 1."""
+    x, y, w, h = box
+    if w <= 0 or h <= 0:
+        return 0.0
+    size = h / tallest if tallest else 1.0
+    # 1.0 at the serial's aspect ratio, halving for every factor of e away from it
+    aspect = math.exp(-0.7 * abs(math.log((w / h) / SERIAL_ASPECT)))
+    dx = abs(x + w / 2 - frame_width / 2) / (frame_width / 2)
+    dy = abs(y + h / 2 - frame_height / 2) / (frame_height / 2)
+    position = 1.0 - 0.25 * (dx + dy)
+    return size * aspect * position
+
+
+def rank_boxes(boxes, frame_width, frame_height):
+    """Return the indices of (x, y, w, h) boxes, most serial-like first."""
+    tallest = max((h for _, _, _, h in boxes), default=0)
+    scores = [serial_likelihood(box, frame_width, frame_height, tallest) for box in boxes]
+    return sorted(range(len(boxes)), key=lambda i: scores[i], reverse=True)
+
+
+def is_confident_serial(text, confidence, min_confidence=EARLY_EXIT_CONFIDENCE):
+    return len(text) >= SERIAL_LENGTH and confidence >= min_confidence
+
+
+def _as_rect(kind, box):
+    """Convert EasyOCR's horizontal [x_min, x_max, y_min, y_max] or free 4-point box to (x, y, w, h)."""
+    if kind == 'horizontal':
+        x_min, x_max, y_min, y_max = box
+    else:
+        xs, ys = [point[0] for point in box], [point[1] for point in box]
+        x_min, x_max, y_min, y_max = min(xs), max(xs), min(ys), max(ys)
+    return x_min, y_min, x_max - x_min, y_max - y_min
+
+
+def readtext_early_exit(reader, image, allowlist, min_confidence=EARLY_EXIT_CONFIDENCE):
+    """Like reader.readtext, but recognize boxes most-likely-serial first and stop at a confident serial.
+
+    Returns readtext's (bbox, text, confidence) triples for the boxes that were recognized.
+    """
+    # Imported here because easyocr pulls in torch; see boot.warm_up()
+    from easyocr.utils import reformat_input
+
+    img, img_cv_grey = reformat_input(image)
+    with span("detect"):
+        horizontal_list, free_list = reader.detect(img, reformat=False)
+    boxes = [('horizontal', box) for box in horizontal_list[0]] + [('free', box) for box in free_list[0]]
+    rects = [_as_rect(kind, box) for kind, box in boxes]
+
+    results = []
+    for i in rank_boxes(rects, img_cv_grey.shape[1], img_cv_grey.shape[0]):
+        kind, box = boxes[i]
+        with span("recognize"):
+            box_results = reader.recognize(
+                img_cv_grey,
+                [box] if kind == 'horizontal' else [],
+                [box] if kind == 'free' else [],
+                allowlist=allowlist, reformat=False,
+            )
+        results.extend(box_results)
+        if any(is_confident_serial(text, confidence, min_confidence) for _, text, confidence in box_results):
+            break
+    return results
@@ -0,0 +1,246 @@
+"""The FINAL.py verification pipeline without the Streamlit UI.
+
+Decode a capture, read its barcode or OCR it (regions first, full frame as
+fallback), pick the serial from each of the three captures and decide whether
+they match.
+"""
+import os
+from datetime import datetime
+
+import numpy as np
+import pytz
+from PIL import Image
+
+from barcode import BARCODE_CAPTURES, decode_barcodes
+from ocr_batch import perform_ocr_batch, readtext_candidates
+from ocr_backends import backend_fingerprint
+from ocr_cache import get_ocr_cache, image_key
+from ocr_early_exit import EARLY_EXIT, SERIAL_LENGTH, is_confident_serial, rank_boxes, readtext_early_exit
+from reader_pool import get_reader_pool
+from roi import crop_regions, find_text_regions
+from serial_reader import SERIAL_MIN_CONFIDENCE, SERIAL_MODE, get_serial_reader
+from tracing import span
+from upscaling import upscale_image, upscale_regions
+
+# Everything that changes the OCR output for a given image; part of the result cache key
+OCR_PARAMS = {"allowlist": '0123456789', "min_length": 4, "scale": "adaptive", "roi": True,
+              "serial_mode": SERIAL_MODE, "result": "candidates", "early_exit": EARLY_EXIT,
+              "backend": backend_fingerprint()}
+
+# Part numbers end with the serial but are a weaker reading of it than the bare serial
+PART_NUMBER_FACTOR = 0.8
+# Captures are decoded at "L" (grayscale, what every reading stage uses) or "RGB"
+DECODE_MODE = os.getenv('OCR_DECODE_MODE', 'L')
+# Captures whose long side is at least twice this are decoded at 1/2, 1/4 or 1/8 scale
+DECODE_MAX_SIDE = int(os.getenv('OCR_DECODE_MAX_SIDE', '2560'))
+
+# Readings scoring below this are ignored; a capture left with none is asked to be retaken
+MIN_SERIAL_SCORE = float(os.getenv('OCR_MIN_SERIAL_SCORE', '0.2'))
+
+MATCH = "匹敵 (Match)"
+NO_MATCH = "一致しない (No Match)"
+
+
+def decode_capture(source, mode=DECODE_MODE, max_side=DECODE_MAX_SIDE):
+    """Decode a path or file-like object straight to mode, reduced when it is far larger than max_side.
+
+    JPEGs use draft mode, so libjpeg itself skips the colour conversion and scales
+    by DCT; other formats are converted and reduced after decoding. RGBA, palette
+    and CMYK images all come out as plain RGB or grayscale.
+    """
+    image = Image.open(source)
+    factor = max(image.size) // max_side if max_side else 1
+    image.draft(mode, (image.size[0] // max(factor, 1), image.size[1] // max(factor, 1)))
+    if image.mode != mode:
+        image = image.convert(mode)
+    factor = max(image.size) // max_side if max_side else 1
+    if factor > 1:
+        image = image.reduce(factor)
+    image.load()
+    return image
+
+
+def load_image(source):
+    """Decode a capture into its one canonical array.
+
+    The array is read-only: display, quality checks, barcode and OCR all read it
+    (or views of it) without copying, and none of them may write to it.
+    """
+    with span("decode"):
+        image = decode_capture(source)
+    with span("to_array"):
+        # asarray wraps the decoded buffer's single copy instead of copying it again
+        return np.asarray(image)
+
+
+def perform_ocr(image, scale=1.0):
+    with get_reader_pool().lease() as reader, span("easyocr"):
+        if EARLY_EXIT:
+            results = readtext_early_exit(reader, image, allowlist='0123456789')
+        else:
+            results = reader.readtext(image, allowlist='0123456789')
+    return readtext_candidates(results, OCR_PARAMS["min_length"], scale)
+
+
+def map_to_capture(candidates, box, scale):
+    """Move candidate boxes from a resized crop back into capture coordinates."""
+    x, y = box[0], box[1]
+    for candidate in candidates:
+        cx, cy, cw, ch = candidate["box"]
+        candidate["box"] = [int(cx / scale) + x, int(cy / scale) + y, int(cw / scale), int(ch / scale)]
+    return candidates
+
+
+def ocr_regions_early_exit(image, boxes):
+    """OCR region crops one at a time, most serial-like first, until one yields a confident serial."""
+    candidates = []
+    for i in rank_boxes(boxes, image.shape[1], image.shape[0]):
+        crop = crop_regions(image, [boxes[i]])[0]
+        with span("resize"):
+            resized = upscale_regions(image, [crop])[0]
+        candidates.extend(map_to_capture(perform_ocr(resized), boxes[i], resized.shape[0] / crop.shape[0]))
+        if any(is_confident_serial(candidate["text"], candidate["confidence"]) for candidate in candidates):
+            break
+    return candidates
+
+
+def ocr_label(image):
+    """OCR only the detected label regions, falling back to the full frame.
+
+    In serial mode the digit-only reader goes first and EasyOCR runs only when it is unsure.
+    With early exit on, regions and text boxes are read most serial-like first until one
+    gives a confident serial, instead of all at once.
+    Returns (candidates, boxes): every reading as a {"text", "confidence", "box"} dict with
+    its box in capture coordinates, and the regions that were read.
+    """
+    with span("roi"):
+        boxes = find_text_regions(image)
+    if SERIAL_MODE:
+        with span("serial"):
+            candidates, confidence = get_serial_reader().readtext(image, boxes)
+        if confidence >= SERIAL_MIN_CONFIDENCE:
+            return candidates, boxes
+    if EARLY_EXIT:
+        candidates = ocr_regions_early_exit(image, boxes)
+    else:
+        crops = crop_regions(image, boxes)
+        with span("resize"):
+            upscaled = upscale_regions(image, crops)
+        candidates = []
+        # All crops of a capture go through the detector and recognizer in one batch
+        for box, resized, crop_candidates in zip(boxes, upscaled, perform_ocr_batch(upscaled)):
+            candidates.extend(map_to_capture(crop_candidates, box, resized.shape[0] / box[3]))
+    if not candidates:
+        boxes = []
+        with span("resize"):
+            upscaled = upscale_image(image)
+        candidates = perform_ocr(upscaled, upscaled.shape[0] / image.shape[0])
+    return candidates, boxes
+
+
+def ocr_image(image):
+    """OCR one capture, answering retakes of the same photo from the cache."""
+    key = image_key(image, **OCR_PARAMS)
+    candidates, boxes = get_ocr_cache().get_or_compute(key, lambda: ocr_label(image))
+    return candidates, boxes
+
+
+def read_capture(image, barcode_first, device_name=None):
+    """Read one capture: its barcode if barcode_first and one decodes, otherwise OCR.
+
+    device_name lets the barcode pass start from what last worked for that device.
+    Returns (candidates, boxes) like ocr_image; barcode candidates have "source": "barcode".
+    """
+    if barcode_first:
+        with span("barcode"):
+            candidates = decode_barcodes(image, device_name)
+        if candidates:
+            return candidates, [candidate["box"] for candidate in candidates]
+    return ocr_image(image)
+
+
+def serial_candidates(candidates):
+    """Score every reading of one capture as a serial.
+
+    A reading, OCR or barcode, qualifies when it has at least 7 digits; its last 7 are
+    the serial, since part numbers end with it. The score is the recognizer confidence, discounted for
+    readings longer than a bare serial and for text smaller than the capture's tallest.
+    Returns {serial: best pick} with picks scoring below MIN_SERIAL_SCORE left out.
+    """
+    tallest = max((candidate["box"][3] for candidate in candidates if candidate.get("box")), default=0)
+    picks = {}
+    for candidate in candidates:
+        text = candidate["text"]
+        if len(text) < SERIAL_LENGTH:
+            continue
+        length_factor = 1.0 if len(text) == SERIAL_LENGTH else PART_NUMBER_FACTOR
+        box = candidate.get("box")
+        height_factor = 0.5 + 0.5 * box[3] / tallest if box and tallest else 1.0
+        score = candidate["confidence"] * length_factor * height_factor
+        serial = text[-SERIAL_LENGTH:]
+        if score >= MIN_SERIAL_SCORE and score > picks.get(serial, {"score": 0.0})["score"]:
+            picks[serial] = {"serial": serial, "text": text, "confidence": candidate["confidence"],
+                             "score": round(score, 3), "source": candidate.get("source", "ocr")}
+    return picks
+
+
+def best_serial(candidates):
+    """Return the highest-scoring serial pick of one capture, or None."""
+    return max(serial_candidates(candidates).values(), key=lambda pick: pick["score"], default=None)
+
+
+def select_serials(ocr_results):
+    """Pick one serial per capture, preferring the value with the highest score across captures.
+
+    Returns one {"serial", "text", "confidence", "score", "source", "retake"} dict per capture;
+    "retake" marks captures that do not support the chosen serial and should be retaken.
+    """
+    per_capture = [serial_candidates(candidates) for candidates in ocr_results]
+    totals = {}
+    for picks in per_capture:
+        for serial, pick in picks.items():
+            totals[serial] = totals.get(serial, 0.0) + pick["score"]
+    consensus = max(totals, key=totals.get) if totals else None
+
+    selections = []
+    for picks in per_capture:
+        pick = picks.get(consensus) or max(picks.values(), key=lambda pick: pick["score"], default=None)
+        if pick is None:
+            pick = {"serial": 'N/A', "text": '', "confidence": 0.0, "score": 0.0, "source": None}
+        selections.append({**pick, "retake": pick["serial"] != consensus})
+    return selections
+
+
+def compare_results(ocr_results):
+    """Pick the serial from each capture and check that all three agree.
+
+    Returns (results, all_match); select_serials() has the scores behind each pick.
+    """
+    results = [selection["serial"] for selection in select_serials(ocr_results)]
+    return results, serials_match(results)
+
+
+def serials_match(results):
+    """True when every capture produced the same serial."""
+    return len(set(results)) == 1 and 'N/A' not in results
+
+
+def jst_timestamp():
+    """Return the current Japan Standard Time as the sheet's timestamp string."""
+    utc_now = datetime.now(pytz.utc)
+    jst_now = utc_now.astimezone(pytz.timezone('Asia/Tokyo'))
+    return jst_now.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def build_row(device_name, results, all_match, timestamp=None):
+    """Return the sheet row for one verified label."""
+    match_status = MATCH if all_match else NO_MATCH
+    return [device_name] + results + [match_status, timestamp or jst_timestamp()]
+
+
+def verify_label(images, device_name=None):
+    """Run the full pipeline on three captures; returns (ocr_results, results, all_match)."""
+    ocr_results = [read_capture(image, step in BARCODE_CAPTURES, device_name)[0]
+                   for step, image in enumerate(images, 1)]
+    results, all_match = compare_results(ocr_results)
+    return ocr_results, results, all_match
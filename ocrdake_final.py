@@ -2,7 +2,7 @@ import streamlit as st
 import cv2
 import numpy as np
 from PIL import Image
-import easyocr
+from reader_pool import get_reader_pool
 
 def upscale_image(image, scale_factor=2):
     """Upscale the image by the given scale factor."""
@@ -12,14 +12,17 @@ def upscale_image(image, scale_factor=2):
 
 def perform_ocr(image):
     """Perform OCR on the upscaled image and return the extracted text."""
-    reader = easyocr.Reader(['en'])
-    results = reader.readtext(image, allowlist='0123456789')
+    with get_reader_pool().lease() as reader:
+        results = reader.readtext(image, allowlist='0123456789')
     ocr_text = [result[1] for result in results if len(result[1]) >= 4]
     return ocr_text
 
 def main():
     st.title("シンワアクティブ SHINWA ACTIVE")
 
+    # Load the shared OCR readers once per process, before the first capture
+    get_reader_pool()
+
     # Initialize session state
     if 'step' not in st.session_state:
         st.session_state.step = 1
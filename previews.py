@@ -0,0 +1,42 @@
+"""Small JPEG previews of captures for the browser.
+
+st.image sends what it is given over the websocket, so echoing a full-resolution
+capture, or a region overlay drawn on one, costs hundreds of kilobytes per step on
+shop-floor Wi-Fi. preview_jpeg() shrinks the capture to OCR_PREVIEW_WIDTH, draws
+the detected regions at that size and encodes the result once. FINAL.py keeps the
+bytes in image_store, so reruns show the same preview without encoding it again,
+and sends the full photo only when the operator asks for it.
+"""
+import io
+import os
+
+import cv2
+from PIL import Image
+
+from roi import draw_roi_overlay
+
+PREVIEW_WIDTH = int(os.getenv('OCR_PREVIEW_WIDTH', '480'))
+PREVIEW_QUALITY = int(os.getenv('OCR_PREVIEW_QUALITY', '70'))
+
+
+def shrink(image, width=PREVIEW_WIDTH):
+    """Return image resized to at most width pixels wide, and the scale applied."""
+    height, full_width = image.shape[:2]
+    if full_width <= width:
+        return image, 1.0
+    step = full_width // (2 * width)
+    if step > 1:
+        # A strided view skips most pixels before the area resize, as in frame_quality.small_gray
+        image = image[::step, ::step]
+    scale = width / full_width
+    return cv2.resize(image, (width, int(height * scale)), interpolation=cv2.INTER_AREA), scale
+
+
+def preview_jpeg(image, boxes=None, width=PREVIEW_WIDTH, quality=PREVIEW_QUALITY):
+    """Return JPEG bytes of a small copy of the capture, with boxes (capture coordinates) outlined."""
+    small, scale = shrink(image, width)
+    if boxes:
+        small = draw_roi_overlay(small, [[int(round(v * scale)) for v in box] for box in boxes])
+    buffer = io.BytesIO()
+    Image.fromarray(small).save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
@@ -0,0 +1,118 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from ocr_backends import create_reader, verify_backend
+from tracing import Histogram, register_metrics
+
+# Number of warm readers kept per process; each concurrent OCR call leases one
+DEFAULT_POOL_SIZE = int(os.getenv('OCR_READER_POOL_SIZE', '2'))
+
+_pool = None
+_pool_lock = threading.Lock()
+_executor = None
+
+
+class ReaderPool:
+    """A fixed-size pool of warm OCR readers shared by all sessions."""
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, languages=('en',)):
+        if size < 1:
+            raise ValueError(f"Reader pool size must be at least 1, got {size}.")
+        self.size = size
+        self.languages = list(languages)
+        self._readers = queue.Queue(maxsize=size)
+        self._stats_lock = threading.Lock()
+        self.load_times = []
+        self.leases = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.lease_wait = Histogram()
+
+        # Refuse to start on a missing or corrupted model store rather than downloading
+        verify_backend()
+        # Load every reader up front so no session pays for model loading
+        for _ in range(size):
+            start = time.perf_counter()
+            reader = create_reader(self.languages)
+            self.load_times.append(time.perf_counter() - start)
+            self._readers.put(reader)
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Borrow a reader for the duration of the with-block."""
+        start = time.perf_counter()
+        try:
+            reader = self._readers.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No OCR reader became free within {timeout} seconds.")
+        wait = time.perf_counter() - start
+        with self._stats_lock:
+            self.leases += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.lease_wait.observe(wait)
+        try:
+            yield reader
+        finally:
+            self._readers.put(reader)
+
+    def stats(self):
+        """Return load and lease-wait figures for sizing the pool; /metrics exports them as well."""
+        with self._stats_lock:
+            return {
+                "size": self.size,
+                "idle": self._readers.qsize(),
+                "load_seconds_total": sum(self.load_times),
+                "load_seconds_max": max(self.load_times, default=0.0),
+                "leases": self.leases,
+                "lease_wait_seconds_avg": self.total_wait / self.leases if self.leases else 0.0,
+                "lease_wait_seconds_max": self.max_wait,
+            }
+
+
+def _collect_metrics():
+    """The reader pool's size, idle readers, load time and lease waits, once it exists."""
+    pool = _pool
+    if pool is None:
+        return []
+    stats = pool.stats()
+    with pool._stats_lock:
+        lease_wait = pool.lease_wait.copy()
+    return [
+        ("ocr_reader_pool_size", "gauge", "Warm OCR readers in this process.", [({}, stats["size"])]),
+        ("ocr_reader_pool_idle", "gauge", "Readers not leased right now.", [({}, stats["idle"])]),
+        ("ocr_reader_pool_load_seconds", "gauge", "Time spent loading the pool's readers.",
+         [({}, stats["load_seconds_total"])]),
+        ("ocr_reader_pool_leases_total", "counter", "Readers leased for an OCR call.", [({}, stats["leases"])]),
+        ("ocr_reader_pool_lease_wait_seconds", "histogram", "Time each OCR call waited for a free reader.",
+         [({}, lease_wait)]),
+    ]
+
+
+register_metrics(_collect_metrics)
+
+
+def get_reader_pool(size=None):
+    """Return the process-wide reader pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ReaderPool(size or DEFAULT_POOL_SIZE)
+    return _pool
+
+
+def get_ocr_executor():
+    """Return the process-wide executor that runs OCR off the Streamlit script thread."""
+    global _executor
+    if _executor is None:
+        size = get_reader_pool().size
+        with _pool_lock:
+            if _executor is None:
+                # One worker per reader; extra submissions queue instead of waiting on a lease
+                _executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="ocr")
+    return _executor
@@ -0,0 +1,79 @@
+import cv2
+import numpy as np
+
+# Regions smaller than this fraction of the frame are treated as noise
+MIN_REGION_AREA = 0.001
+# Padding around each region so upscaling does not clip the outer digits
+REGION_PADDING = 0.15
+
+
+def to_gray(image):
+    """Convert an RGB, RGBA or grayscale array to a single-channel array."""
+    if image.ndim == 2:
+        return image
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_RGBA2GRAY)
+    return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+
+
+def find_text_regions(image, max_regions=6):
+    """Find candidate text or barcode regions at native resolution.
+
+    Returns (x, y, w, h) boxes in reading order, top to bottom and left to right.
+    """
+    gray = to_gray(image)
+    height, width = gray.shape[:2]
+
+    # Dark strokes on a light label stand out in a blackhat; bright-on-dark in a tophat
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 5))
+    strokes = cv2.max(cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, kernel),
+                      cv2.morphologyEx(gray, cv2.MORPH_TOPHAT, kernel))
+    _, mask = cv2.threshold(strokes, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+    # Join neighbouring characters (or barcode bars) into one blob per line
+    close_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(width // 40, 9), max(height // 120, 3)))
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, close_kernel)
+    mask = cv2.erode(mask, None, iterations=1)
+    mask = cv2.dilate(mask, None, iterations=2)
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_area = MIN_REGION_AREA * width * height
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        # Text lines and barcodes are wider than tall; skip specks and full-frame blobs
+        if w * h < min_area or w < 1.5 * h or w * h > 0.9 * width * height:
+            continue
+        boxes.append((x, y, w, h))
+
+    boxes = sorted(boxes, key=lambda box: box[2] * box[3], reverse=True)[:max_regions]
+    boxes = [pad_box(box, width, height) for box in boxes]
+    return sorted(boxes, key=lambda box: (box[1], box[0]))
+
+
+def pad_box(box, width, height, padding=REGION_PADDING):
+    """Grow a box by a fraction of its height on every side, clipped to the frame."""
+    x, y, w, h = box
+    pad = int(h * padding) + 2
+    x0, y0 = max(x - pad, 0), max(y - pad, 0)
+    x1, y1 = min(x + w + pad, width), min(y + h + pad, height)
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def crop_regions(image, boxes):
+    """Return views of the image for each box."""
+    return [image[y:y + h, x:x + w] for x, y, w, h in boxes]
+
+
+def draw_roi_overlay(image, boxes, color=(0, 255, 0)):
+    """Return a copy of the image with the detected regions outlined."""
+    overlay = np.ascontiguousarray(image).copy()
+    if overlay.ndim == 2:
+        overlay = cv2.cvtColor(overlay, cv2.COLOR_GRAY2RGB)
+    elif overlay.shape[2] == 4:
+        overlay = cv2.cvtColor(overlay, cv2.COLOR_RGBA2RGB)
+    thickness = max(overlay.shape[1] // 400, 2)
+    for i, (x, y, w, h) in enumerate(boxes, 1):
+        cv2.rectangle(overlay, (x, y), (x + w, y + h), color, thickness)
+        cv2.putText(overlay, str(i), (x, max(y - 5, 15)), cv2.FONT_HERSHEY_SIMPLEX, thickness / 3, color, thickness)
+    return overlay
@@ -0,0 +1,189 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Rows are committed here before any attempt is made to reach Google Sheets. Relative paths are
+# taken from the app directory, so every entry point shares one spool wherever it is started from
+SPOOL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.getenv('SHEETS_SPOOL_PATH', 'sheets_spool.db'))
+
+# Reclaim space from drained rows once this many have been deleted
+COMPACT_EVERY = int(os.getenv('SHEETS_SPOOL_COMPACT_EVERY', '500'))
+# Seconds an uploader's claim on a batch lasts unless renewed; rows claimed by an
+# uploader that died are taken over by another one after this long
+CLAIM_LEASE = float(os.getenv('SHEETS_CLAIM_LEASE', '300'))
+
+_spool = None
+_spool_lock = threading.Lock()
+
+
+class RowSpool:
+    """An append-only SQLite (WAL) spool of rows waiting to be uploaded.
+
+    Several uploaders, in one process or many, may share a spool: each claims the
+    rows it is about to send, so no row is sent twice.
+    """
+
+    def __init__(self, path=SPOOL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._drained_since_compact = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # auto_vacuum only takes effect before the database is first written (journal_mode=WAL
+        # writes it); a spool created without it is switched over by one VACUUM
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            self._conn.execute("VACUUM")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # FULL fsyncs every commit so an acknowledged row survives power loss too
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " sheet TEXT NOT NULL,"
+            " row TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " failed INTEGER NOT NULL DEFAULT 0,"
+            " last_error TEXT,"
+            " claimed_by TEXT,"
+            " claimed_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS rows_pending ON rows (sheet, failed, id)")
+        with self._transaction():
+            # Spools written before rows were claimed lack the claim columns
+            columns = {column[1] for column in self._conn.execute("PRAGMA table_info(rows)")}
+            if "claimed_by" not in columns:
+                self._conn.execute("ALTER TABLE rows ADD COLUMN claimed_by TEXT")
+                self._conn.execute("ALTER TABLE rows ADD COLUMN claimed_at REAL")
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so two uploaders cannot read the same free rows
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def append(self, sheet_name, row):
+        """Durably commit a row; returns once it is on disk."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO rows (sheet, row, created) VALUES (?, ?, ?)",
+                (sheet_name, json.dumps(row, ensure_ascii=False), time.time()),
+            )
+
+    def pending(self, sheet_name, limit):
+        """Return up to limit (id, row) pairs in the order they were spooled."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT id, row FROM rows WHERE sheet = ? AND failed = 0 ORDER BY id LIMIT ?",
+                (sheet_name, limit),
+            )
+            return [(row_id, json.loads(row)) for row_id, row in cursor.fetchall()]
+
+    def claim(self, sheet_name, limit, owner, lease=None):
+        """Claim up to limit (id, row) pairs for owner, in the order they were spooled.
+
+        Rows another uploader claimed less than lease seconds ago are skipped.
+        """
+        lease = CLAIM_LEASE if lease is None else lease
+        now = time.time()
+        with self._lock, self._transaction():
+            rows = self._conn.execute(
+                "SELECT id, row FROM rows WHERE sheet = ? AND failed = 0"
+                " AND (claimed_by IS NULL OR claimed_by = ? OR claimed_at < ?) ORDER BY id LIMIT ?",
+                (sheet_name, owner, now - lease, limit),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE rows SET claimed_by = ?, claimed_at = ? WHERE id = ?",
+                [(owner, now, row_id) for row_id, _ in rows],
+            )
+        return [(row_id, json.loads(row)) for row_id, row in rows]
+
+    def renew(self, row_ids, owner):
+        """Extend owner's claim on rows; returns False if any was taken over or is gone."""
+        with self._lock, self._transaction():
+            renewed = sum(
+                self._conn.execute(
+                    "UPDATE rows SET claimed_at = ? WHERE id = ? AND claimed_by = ? AND failed = 0",
+                    (time.time(), row_id, owner),
+                ).rowcount
+                for row_id in row_ids
+            )
+        return renewed == len(row_ids)
+
+    def release(self, row_ids, owner):
+        """Give up owner's claim on rows so another uploader can send them right away."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE rows SET claimed_by = NULL, claimed_at = NULL WHERE id = ? AND claimed_by = ?",
+                [(row_id, owner) for row_id in row_ids],
+            )
+
+    def count(self, sheet_name=None):
+        with self._lock:
+            if sheet_name is None:
+                return self._conn.execute("SELECT COUNT(*) FROM rows WHERE failed = 0").fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM rows WHERE sheet = ? AND failed = 0", (sheet_name,)
+            ).fetchone()[0]
+
+    def count_failed(self, sheet_name=None):
+        """Number of parked rows, waiting for requeue_failed()."""
+        with self._lock:
+            if sheet_name is None:
+                return self._conn.execute("SELECT COUNT(*) FROM rows WHERE failed = 1").fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM rows WHERE sheet = ? AND failed = 1", (sheet_name,)
+            ).fetchone()[0]
+
+    def sheets(self):
+        """Return the names of sheets that still have rows waiting."""
+        with self._lock:
+            return [name for (name,) in self._conn.execute("SELECT DISTINCT sheet FROM rows WHERE failed = 0")]
+
+    def mark_drained(self, row_ids):
+        """Delete rows that reached Google Sheets and compact the spool periodically."""
+        with self._lock:
+            self._conn.executemany("DELETE FROM rows WHERE id = ?", [(row_id,) for row_id in row_ids])
+            self._drained_since_compact += len(row_ids)
+            if self._drained_since_compact >= COMPACT_EVERY:
+                self._compact()
+
+    def mark_failed(self, row_ids, error):
+        """Park rows that Google rejected outright so they can be replayed by hand."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE rows SET failed = 1, last_error = ?, claimed_by = NULL, claimed_at = NULL WHERE id = ?",
+                [(error, row_id) for row_id in row_ids],
+            )
+
+    def requeue_failed(self, sheet_name=None):
+        """Move parked rows back into the upload queue."""
+        with self._lock:
+            if sheet_name is None:
+                return self._conn.execute("UPDATE rows SET failed = 0 WHERE failed = 1").rowcount
+            return self._conn.execute(
+                "UPDATE rows SET failed = 0 WHERE failed = 1 AND sheet = ?", (sheet_name,)
+            ).rowcount
+
+    def _compact(self):
+        # execute() steps incremental_vacuum once, freeing a single page; executescript runs it to the end
+        self._conn.executescript("PRAGMA incremental_vacuum;")
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._drained_since_compact = 0
+
+
+def get_row_spool():
+    """Return the process-wide row spool."""
+    global _spool
+    if _spool is None:
+        with _spool_lock:
+            if _spool is None:
+                _spool = RowSpool()
+    return _spool
@@ -0,0 +1,223 @@
+"""Digit-only "serial mode" recognizer for the label font.
+
+Text lines come from roi.find_text_regions. Each line is split into glyphs
+with connected components, and every glyph is classified against digit
+templates by nearest neighbour. Classifying takes a few milliseconds per
+capture; finding the lines takes up to about 100 ms on a 12 MP photo, which the
+EasyOCR path pays as well. Every read carries a confidence so ocr_pipeline can
+fall back to EasyOCR whenever serial mode is unsure.
+
+The built-in templates are rendered from OpenCV's Hershey fonts. Fit the
+templates to the real label font from labelled photos with
+
+    python serial_reader.py train benchmarks/fixtures/manifest.csv
+
+The manifest needs image, serial and part_number columns.
+"""
+import argparse
+import csv
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from roi import crop_regions, find_text_regions, to_gray
+
+SERIAL_MODE = os.getenv('OCR_SERIAL_MODE', '0') == '1'
+SERIAL_TEMPLATES = os.getenv('OCR_SERIAL_TEMPLATES', 'serial_templates.npz')
+# Below this, ocr_pipeline falls back to the full EasyOCR path
+SERIAL_MIN_CONFIDENCE = float(os.getenv('OCR_SERIAL_MIN_CONFIDENCE', '0.35'))
+
+# Glyphs are compared as GLYPH_WIDTH x GLYPH_HEIGHT patches scaled to a common height
+GLYPH_WIDTH, GLYPH_HEIGHT = 24, 32
+MIN_GLYPH_HEIGHT = 8
+# Lines with more components than this are barcodes or artwork, not text
+MAX_LINE_GLYPHS = 24
+
+_reader = None
+_reader_lock = threading.Lock()
+
+
+def normalize_glyph(mask):
+    """Scale a binary glyph to a fixed height, keep its aspect and return a unit vector."""
+    height, width = mask.shape
+    scale = GLYPH_HEIGHT / height
+    scaled_width = min(max(int(round(width * scale)), 1), GLYPH_WIDTH)
+    glyph = cv2.resize(mask, (scaled_width, GLYPH_HEIGHT), interpolation=cv2.INTER_AREA)
+    # Centre horizontally so a narrow "1" stays narrow instead of being stretched
+    canvas = np.zeros((GLYPH_HEIGHT, GLYPH_WIDTH), np.float32)
+    x = (GLYPH_WIDTH - scaled_width) // 2
+    canvas[:, x:x + scaled_width] = glyph
+    canvas = cv2.GaussianBlur(canvas, (3, 3), 0).ravel()
+    canvas -= canvas.mean()
+    norm = np.linalg.norm(canvas)
+    return canvas / norm if norm else canvas
+
+
+def segment_line(crop):
+    """Split one text-line crop into glyphs, left to right.
+
+    Returns a list of (x, y, w, h) boxes and a matching list of glyph vectors.
+    """
+    gray = to_gray(crop)
+    # Label digits are dark on light; invert so they become the foreground
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    height, width = mask.shape
+
+    candidates = []
+    for i in range(1, count):
+        x, y, w, h, _ = stats[i]
+        # Components touching the crop edge are the label border or the background
+        if x == 0 or y == 0 or x + w == width or y + h == height or h < MIN_GLYPH_HEIGHT:
+            continue
+        candidates.append(i)
+    if not candidates:
+        return [], []
+
+    median_height = np.median([stats[i, cv2.CC_STAT_HEIGHT] for i in candidates])
+    glyphs = [i for i in candidates if stats[i, cv2.CC_STAT_HEIGHT] >= 0.6 * median_height]
+    glyphs.sort(key=lambda i: stats[i, cv2.CC_STAT_LEFT])
+
+    boxes, vectors = [], []
+    for i in glyphs:
+        x, y, w, h, _ = stats[i]
+        boxes.append((x, y, w, h))
+        vectors.append(normalize_glyph((labels[y:y + h, x:x + w] == i).astype(np.float32)))
+    return boxes, vectors
+
+
+def render_templates():
+    """Render 0-9 in the Hershey fonts at a few stroke weights as fallback templates."""
+    vectors, labels = [], []
+    for font in (cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX, cv2.FONT_HERSHEY_PLAIN):
+        for thickness in (2, 4, 6):
+            for digit in '0123456789':
+                image = np.full((120, 100), 255, np.uint8)
+                cv2.putText(image, digit, (20, 90), font, 2.5, 0, thickness, cv2.LINE_AA)
+                _, line_vectors = segment_line(image)
+                if len(line_vectors) == 1:
+                    vectors.append(line_vectors[0])
+                    labels.append(int(digit))
+    return np.array(vectors), np.array(labels)
+
+
+class SerialReader:
+    """Nearest-neighbour digit classifier over a set of glyph templates."""
+
+    def __init__(self, templates=SERIAL_TEMPLATES):
+        if templates and os.path.exists(templates):
+            with np.load(templates) as data:
+                self.vectors, self.labels = data['vectors'], data['labels']
+            self.source = templates
+        else:
+            self.vectors, self.labels = render_templates()
+            self.source = "hershey"
+
+    def classify(self, vectors):
+        """Return (digits, confidences) for a list of glyph vectors.
+
+        A glyph's confidence is how far its best digit beats the best other digit,
+        scaled to 0-1, so ambiguous glyphs score low even when they resemble a template.
+        """
+        similarity = np.asarray(vectors) @ self.vectors.T
+        per_digit = np.full((len(vectors), 10), -1.0, np.float32)
+        for digit in range(10):
+            columns = self.labels == digit
+            if columns.any():
+                per_digit[:, digit] = similarity[:, columns].max(axis=1)
+        ranked = np.sort(per_digit, axis=1)
+        best, second = ranked[:, -1], ranked[:, -2]
+        confidences = np.clip((best - second) / np.maximum(1 - second, 1e-6), 0.0, 1.0) * np.clip(best, 0.0, 1.0)
+        return per_digit.argmax(axis=1), confidences
+
+    def read_line(self, crop):
+        """Read one line crop; returns (text, confidence, box) with box around the glyphs read.
+
+        Returns ('', 0.0, None) when the crop is not a digit line.
+        """
+        boxes, vectors = segment_line(crop)
+        if not vectors or len(vectors) > MAX_LINE_GLYPHS:
+            return '', 0.0, None
+        digits, confidences = self.classify(vectors)
+        confidence = float(confidences.min())
+        # Touching digits merge into one wide component that no single template explains
+        if any(w > 1.2 * h for _, _, w, h in boxes):
+            confidence = 0.0
+        x0 = min(x for x, _, _, _ in boxes)
+        y0 = min(y for _, y, _, _ in boxes)
+        x1 = max(x + w for x, _, w, _ in boxes)
+        y1 = max(y + h for _, y, _, h in boxes)
+        return ''.join(map(str, digits)), confidence, [int(x0), int(y0), int(x1 - x0), int(y1 - y0)]
+
+    def readtext(self, image, boxes=None, min_length=4):
+        """Read every digit line of a capture in reading order.
+
+        Returns (candidates, confidence): candidates shaped like perform_ocr's output, and
+        the confidence of the best 7-digit or longer line, the one the serial is taken from,
+        or 0.0 when there is none. A misread line elsewhere on the label does not lower it;
+        ocr_pipeline drops such readings by their own low score.
+        """
+        if boxes is None:
+            boxes = find_text_regions(image)
+        candidates = []
+        for (x, y, _, _), crop in zip(boxes, crop_regions(image, boxes)):
+            text, confidence, box = self.read_line(crop)
+            if len(text) >= min_length:
+                candidates.append({"text": text, "confidence": confidence,
+                                   "box": [box[0] + x, box[1] + y, box[2], box[3]]})
+        return candidates, max((candidate["confidence"] for candidate in candidates
+                                if len(candidate["text"]) >= 7), default=0.0)
+
+
+def get_serial_reader():
+    """Return the process-wide serial-mode reader, loading its templates on first use."""
+    global _reader
+    if _reader is None:
+        with _reader_lock:
+            if _reader is None:
+                _reader = SerialReader()
+    return _reader
+
+
+def train_templates(manifest, output=SERIAL_TEMPLATES):
+    """Harvest glyph templates from labelled photos whose lines segment cleanly."""
+    from PIL import Image
+
+    base = os.path.dirname(os.path.abspath(manifest))
+    vectors, labels = [], []
+    with open(manifest, newline='') as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        image = np.array(Image.open(os.path.join(base, row['image'])).convert('RGB'))
+        expected = [row[column] for column in ('serial', 'part_number') if row.get(column)]
+        for crop in crop_regions(image, find_text_regions(image)):
+            _, line_vectors = segment_line(crop)
+            # Only trust lines whose glyph count matches a known string exactly
+            for text in expected:
+                if len(line_vectors) == len(text):
+                    vectors.extend(line_vectors)
+                    labels.extend(int(digit) for digit in text)
+                    break
+
+    if not vectors:
+        raise SystemExit("No line in the manifest segmented into the expected number of digits.")
+    missing = sorted(set(range(10)) - set(labels))
+    if missing:
+        print(f"Warning: no samples for digits {missing}; they will never be read.")
+    np.savez_compressed(output, vectors=np.array(vectors, np.float32), labels=np.array(labels))
+    print(f"Saved {len(vectors)} glyph templates from {len(rows)} photos to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['train'])
+    parser.add_argument('manifest', help="CSV with image, serial and part_number columns")
+    parser.add_argument('--output', default=SERIAL_TEMPLATES)
+    args = parser.parse_args()
+    train_templates(args.manifest, args.output)
+
+
+if __name__ == "__main__":
+    main()
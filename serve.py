@@ -0,0 +1,35 @@
+"""Start the OCR station with models loaded before the first session.
+
+    python serve.py [--port 8501]
+
+Starts the /ready health server, runs boot.warm_up() and only then starts
+Streamlit on FINAL.py in the same process, so every session shares the warm
+reader pool.
+"""
+import argparse
+import os
+
+from boot import HEALTH_PORT, start_health_server, status, warm_up
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8501, help="Streamlit server port")
+    parser.add_argument('--script', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'FINAL.py'))
+    args = parser.parse_args()
+
+    start_health_server()
+    print(f"Health checks on http://0.0.0.0:{HEALTH_PORT}/ready")
+    phases = warm_up()
+    print(f"Warm-up finished in {status()['cold_start_seconds']}s: {phases}")
+    for phase, error in status()["errors"].items():
+        print(f"Warm-up phase {phase} failed: {error}")
+
+    from streamlit.web import bootstrap
+    flag_options = {"server.port": args.port, "server.headless": True}
+    bootstrap.load_config_options(flag_options=flag_options)
+    bootstrap.run(args.script, False, [], flag_options)
+
+
+if __name__ == "__main__":
+    main()
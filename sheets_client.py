@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import time
+from datetime import timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dotenv import load_dotenv
+
+from tracing import span
+
+# Load environment variables from the .env file
+load_dotenv()
+
+REQUIRED_VARS = [
+    "GCP_PROJECT_ID", "GCP_PRIVATE_KEY_ID", "GCP_PRIVATE_KEY",
+    "GCP_CLIENT_EMAIL", "GCP_CLIENT_ID", "GCP_CLIENT_X509_CERT_URL"
+]
+
+# Refresh the OAuth token this many seconds before it expires
+TOKEN_REFRESH_MARGIN = int(os.getenv('SHEETS_TOKEN_REFRESH_MARGIN', '300'))
+
+# When set, worksheets are served by a local stand-in endpoint instead of Google
+STAND_IN_URL = os.getenv('SHEETS_STAND_IN_URL')
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def build_credentials():
+    """Build service account credentials from the GCP_* environment variables."""
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    for var in REQUIRED_VARS:
+        if os.getenv(var) is None:
+            raise ValueError(f"Environment variable {var} is not set.")
+
+    creds_json = {
+        "type": "service_account",
+        "project_id": os.getenv('GCP_PROJECT_ID'),
+        "private_key_id": os.getenv('GCP_PRIVATE_KEY_ID'),
+        "private_key": os.getenv('GCP_PRIVATE_KEY'),
+        "client_email": os.getenv('GCP_CLIENT_EMAIL'),
+        "client_id": os.getenv('GCP_CLIENT_ID'),
+        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+        "token_uri": "https://oauth2.googleapis.com/token",
+        "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
+        "client_x509_cert_url": os.getenv('GCP_CLIENT_X509_CERT_URL')
+    }
+    return ServiceAccountCredentials.from_json_keyfile_dict(creds_json)
+
+
+class StandInWorksheet:
+    """Minimal worksheet that appends rows to a local stand-in Sheets endpoint."""
+
+    def __init__(self, session, base_url, sheet_key):
+        self.session = session
+        self.url = f"{base_url.rstrip('/')}/{sheet_key}/rows"
+
+    def append_row(self, row, **kwargs):
+        return self.append_rows([row], **kwargs)
+
+    def append_rows(self, rows, **kwargs):
+        response = self.session.post(self.url, json={"values": rows})
+        response.raise_for_status()
+        return response.json()
+
+
+class SheetsClient:
+    """A process-level gspread client that keeps its HTTP session and token warm."""
+
+    def __init__(self, stand_in_url=STAND_IN_URL):
+        self.stand_in_url = stand_in_url
+        self._worksheets = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        # gspread, google-auth and requests are imported on first use to keep app startup cheap
+        import gspread
+        import requests
+
+        if stand_in_url:
+            self.gc = None
+            self.session = requests.Session()
+            return
+
+        self.gc = gspread.authorize(build_credentials())
+        # gspread 6 keeps the session on http_client, older releases on the client
+        http_client = getattr(self.gc, 'http_client', self.gc)
+        self.auth = http_client.auth
+        self.session = http_client.session
+        self._refresh_token()
+        self._refresher = threading.Thread(target=self._refresh_loop, name="sheets-token-refresh", daemon=True)
+        self._refresher.start()
+
+    def _refresh_token(self):
+        """Fetch a new access token using the pooled session."""
+        from google.auth.transport.requests import Request
+
+        with self._lock:
+            self.auth.refresh(Request(session=self.session))
+
+    def _seconds_until_refresh(self):
+        expiry = getattr(self.auth, 'expiry', None)
+        if expiry is None:
+            return TOKEN_REFRESH_MARGIN
+        # google-auth stores naive UTC expiry times
+        if expiry.tzinfo is None:
+            expiry = expiry.replace(tzinfo=timezone.utc)
+        remaining = expiry.timestamp() - time.time()
+        return max(remaining - TOKEN_REFRESH_MARGIN, 0)
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self._seconds_until_refresh()):
+            try:
+                self._refresh_token()
+            except Exception:
+                # Retry shortly; requests still refresh on demand if this keeps failing
+                self._stop.wait(30)
+
+    def worksheet(self, sheet_key):
+        """Return the first worksheet of the named spreadsheet, opening it only once."""
+        with self._lock:
+            worksheet = self._worksheets.get(sheet_key)
+        if worksheet is not None:
+            return worksheet
+
+        if self.stand_in_url:
+            worksheet = StandInWorksheet(self.session, self.stand_in_url, sheet_key)
+        else:
+            with span("sheets_open"):
+                worksheet = self.gc.open(sheet_key).sheet1
+        with self._lock:
+            return self._worksheets.setdefault(sheet_key, worksheet)
+
+    def close(self):
+        self._stop.set()
+        self.session.close()
+
+
+def get_sheets_client():
+    """Return the process-wide Sheets client, authorizing on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = SheetsClient()
+    return _client
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    rows = {}
+
+    def do_POST(self):
+        sheet_key = self.path.strip('/').split('/')[0]
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        values = body.get("values", [])
+        self.rows.setdefault(sheet_key, []).extend(values)
+        payload = json.dumps({"updates": {"updatedRows": len(values)}}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        payload = json.dumps(self.rows).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def serve_stand_in(host='127.0.0.1', port=8765):
+    """Run a local stand-in Sheets endpoint that records appended rows in memory."""
+    server = ThreadingHTTPServer((host, port), _StandInHandler)
+    print(f"Stand-in Sheets endpoint listening on http://{host}:{port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    serve_stand_in()
@@ -0,0 +1,244 @@
+import argparse
+import atexit
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+
+from row_spool import CLAIM_LEASE, get_row_spool
+from sheets_client import get_sheets_client
+from tracing import Histogram, register_metrics, span
+
+logger = logging.getLogger(__name__)
+
+# Flush when this many rows are waiting or the oldest row has waited this long
+BATCH_SIZE = int(os.getenv('SHEETS_BATCH_SIZE', '50'))
+FLUSH_INTERVAL = float(os.getenv('SHEETS_FLUSH_INTERVAL', '2.0'))
+MAX_BACKOFF = float(os.getenv('SHEETS_MAX_BACKOFF', '60'))
+
+# 4xx statuses that are still worth retrying: request timeout and quota exhaustion
+RETRYABLE_STATUSES = {408, 429}
+
+_queues = {}
+_queues_lock = threading.Lock()
+_requeued = False
+
+
+def is_retryable(exc):
+    """Return True if a failed append should be retried rather than parked.
+
+    Only a definitive 4xx answer from the Sheets API parks rows. Anything without
+    a response (network errors, google-auth TransportError or RefreshError, or a
+    Sheets client that could not be built) is an outage and is retried.
+    """
+    response = getattr(exc, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is None:
+        return True
+    return not 400 <= status < 500 or status in RETRYABLE_STATUSES
+
+
+class SheetsWriteQueue:
+    """Drain rows spooled by every session to a worksheet in batches.
+
+    Rows are claimed in the spool before they are sent, so queues in other
+    processes sharing the spool (verify_batch --sheet, other app workers) never
+    send the same rows.
+    """
+
+    def __init__(self, sheet_name, spool=None, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.sheet_name = sheet_name
+        self.spool = spool or get_row_spool()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._cond = threading.Condition()
+        self._closed = False
+        self._close_deadline = None
+        self.owner = uuid.uuid4().hex
+        self.flushes = 0
+        self.rows_flushed = 0
+        self.rows_failed = 0
+        self.retries = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.flush_seconds = Histogram()
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name="sheets-write-behind", daemon=True)
+        self._thread.start()
+
+    def put(self, row):
+        """Commit a row to the spool and return without waiting on Google."""
+        if self._closed:
+            raise RuntimeError("Write queue is closed.")
+        with span("spool_append"):
+            self.spool.append(self.sheet_name, list(row))
+        with self._cond:
+            self._cond.notify()
+
+    def _take_batch(self):
+        waiting = self.spool.count(self.sheet_name)
+        if waiting < self.batch_size and not self._closed:
+            with self._cond:
+                # Poll as well as wait, so a row spooled just before the wait is not stranded
+                if not waiting:
+                    self._cond.wait(self.flush_interval)
+                    if not self.spool.count(self.sheet_name):
+                        return []
+                # Give the batch one window to fill up before flushing
+                deadline = time.monotonic() + self.flush_interval
+                while not self._closed and self.spool.count(self.sheet_name) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+        return self.spool.claim(self.sheet_name, self.batch_size, self.owner)
+
+    def _flush(self, batch):
+        """Upload one batch; returns False if the queue closed while Sheets was still unreachable."""
+        row_ids = [row_id for row_id, _ in batch]
+        rows = [row for _, row in batch]
+        backoff = 1.0
+        while True:
+            if not self.spool.renew(row_ids, self.owner):
+                # Our claim lapsed during a long outage and another uploader took the rows
+                logger.warning("%d rows were taken over by another uploader", len(rows))
+                return True
+            start = time.perf_counter()
+            try:
+                with span("sheets_append"):
+                    get_sheets_client().worksheet(self.sheet_name).append_rows(rows)
+            except Exception as exc:
+                self.last_error = repr(exc)
+                if not is_retryable(exc):
+                    logger.error("Parking %d rows in the spool after Sheets error: %r", len(rows), exc)
+                    self.spool.mark_failed(row_ids, repr(exc))
+                    self.rows_failed += len(rows)
+                    return True
+                if self._closed and backoff >= MAX_BACKOFF:
+                    # Leave the rows spooled for another uploader or the next process start
+                    self.spool.release(row_ids, self.owner)
+                    return False
+                self.retries += 1
+                logger.warning("Sheets append failed (%r), retrying in %.1fs", exc, backoff)
+                time.sleep(backoff + random.uniform(0, backoff / 2))
+                backoff = min(backoff * 2, MAX_BACKOFF)
+                continue
+            elapsed = time.perf_counter() - start
+            self.spool.mark_drained(row_ids)
+            self.flushes += 1
+            self.rows_flushed += len(rows)
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            self.flush_seconds.observe(elapsed)
+            return True
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch:
+                if not self._flush(batch):
+                    return
+            elif self._closed:
+                # Rows left are being sent by another uploader; wait for them, or for its claim to lapse
+                if not self.spool.count(self.sheet_name) or time.monotonic() > self._close_deadline:
+                    return
+                with self._cond:
+                    self._cond.wait(self.flush_interval)
+
+    def depth(self):
+        return self.spool.count(self.sheet_name)
+
+    def stats(self):
+        """Return queue depth and flush metrics; /metrics exports them as well."""
+        return {
+            "depth": self.depth(),
+            "parked": self.spool.count_failed(self.sheet_name),
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+            "rows_failed": self.rows_failed,
+            "retries": self.retries,
+            "last_flush_seconds": self.last_flush_seconds,
+            "max_flush_seconds": self.max_flush_seconds,
+            "last_error": self.last_error,
+        }
+
+    def close(self, timeout=None):
+        """Flush whatever is queued and stop the background thread."""
+        with self._cond:
+            self._close_deadline = time.monotonic() + CLAIM_LEASE + self.flush_interval
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+
+def get_write_queue(sheet_name):
+    """Return the process-wide write queue for a spreadsheet name."""
+    with _queues_lock:
+        write_queue = _queues.get(sheet_name)
+        if write_queue is None:
+            write_queue = _queues[sheet_name] = SheetsWriteQueue(sheet_name)
+        return write_queue
+
+
+def resume_spooled_uploads():
+    """Start uploaders for every sheet that still has rows spooled from earlier runs.
+
+    Rows parked by an earlier process are put back in the queue once per process,
+    so a rejection that has since been fixed (sharing, sheet name) does not strand them.
+    """
+    global _requeued
+    spool = get_row_spool()
+    with _queues_lock:
+        requeue, _requeued = not _requeued, True
+    if requeue:
+        requeued = spool.requeue_failed()
+        if requeued:
+            logger.warning("Retrying %d rows parked by an earlier run", requeued)
+    for sheet_name in spool.sheets():
+        get_write_queue(sheet_name)
+
+
+def _collect_metrics():
+    """Every write queue's depth, parked rows, flush counts and flush latency, labelled by sheet."""
+    with _queues_lock:
+        queues = [({"sheet": write_queue.sheet_name}, write_queue) for write_queue in _queues.values()]
+    return [
+        ("ocr_sheets_queue_depth", "gauge", "Rows spooled and waiting to be uploaded.",
+         [(labels, write_queue.depth()) for labels, write_queue in queues]),
+        ("ocr_sheets_parked_rows", "gauge", "Rows Google rejected, waiting for a requeue.",
+         [(labels, write_queue.spool.count_failed(write_queue.sheet_name)) for labels, write_queue in queues]),
+        ("ocr_sheets_rows_flushed_total", "counter", "Rows uploaded by this process.",
+         [(labels, write_queue.rows_flushed) for labels, write_queue in queues]),
+        ("ocr_sheets_rows_parked_total", "counter", "Rows this process parked after a rejection.",
+         [(labels, write_queue.rows_failed) for labels, write_queue in queues]),
+        ("ocr_sheets_retries_total", "counter", "Append attempts retried after an outage or quota error.",
+         [(labels, write_queue.retries) for labels, write_queue in queues]),
+        ("ocr_sheets_flush_seconds", "histogram", "Time of each successful batched append.",
+         [(labels, write_queue.flush_seconds) for labels, write_queue in queues]),
+    ]
+
+
+register_metrics(_collect_metrics)
+
+
+@atexit.register
+def _close_all():
+    for write_queue in list(_queues.values()):
+        write_queue.close(timeout=FLUSH_INTERVAL + 5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the row spool or retry parked rows.")
+    parser.add_argument('command', choices=['status', 'requeue'])
+    parser.add_argument('--sheet', help="only this spreadsheet")
+    args = parser.parse_args()
+    spool = get_row_spool()
+    if args.command == 'requeue':
+        print(f"Requeued {spool.requeue_failed(args.sheet)} parked rows")
+    print(f"Spool {spool.path}: {spool.count(args.sheet)} rows waiting, {spool.count_failed(args.sheet)} parked")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Continuous scanning of a live video stream, one label after another.
+
+LabelScanner takes frames as they arrive (from the WebRTC callback in
+FINAL.py, or from the replay harness below). It samples a few per second and
+drops frames that fail the frame_quality checks (blur, glare, exposure),
+are still moving or show no label. Frames that
+pass are sent to the OCR executor, barcode first. When the last three reads
+agree, the label is finished and its row is queued for Sheets; the scanner
+then waits for a different serial before starting the next label.
+
+Set OCR_STREAM_SOURCE to a video file to loop it through the real WebRTC
+path in place of the browser camera. The replay harness runs the same loop
+without a browser or camera: it feeds a video file, or fixture photos held in
+front of a simulated camera, at a fixed frame rate and reports labels per
+minute:
+
+    python stream_scanner.py replay benchmarks/fixtures/*.jpg --fps 15 --hold 4
+    python stream_scanner.py replay station.mp4
+"""
+import argparse
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from frame_quality import check_gray, motion, small_gray
+from ocr_pipeline import DECODE_MODE, best_serial, load_image, read_capture
+from reader_pool import get_ocr_executor
+from roi import find_text_regions
+
+# Video file that FINAL.py streams through WebRTC instead of the camera (loopback testing)
+STREAM_SOURCE = os.getenv('OCR_STREAM_SOURCE')
+# Seconds between frames considered for reading; the rest are only displayed
+STREAM_SAMPLE_INTERVAL = float(os.getenv('OCR_STREAM_SAMPLE_INTERVAL', '0.2'))
+# Mean grey-level change between sampled frames above this counts as moving
+STREAM_MAX_MOTION = float(os.getenv('OCR_STREAM_MAX_MOTION', '6'))
+READS_PER_LABEL = 3
+# Finished labels kept for display; older ones are already queued for Sheets
+MAX_RECENT_LABELS = 50
+
+
+class LabelScanner:
+    """Thread-safe state machine turning a stream of frames into verified labels."""
+
+    def __init__(self, device_name, on_label=None, reads_needed=READS_PER_LABEL,
+                 sample_interval=STREAM_SAMPLE_INTERVAL):
+        self.device_name = device_name
+        # Called with (results, all_match) from an OCR thread when a label is finished
+        self.on_label = on_label
+        self.reads_needed = reads_needed
+        self.sample_interval = sample_interval
+        self._lock = threading.Lock()
+        self._last_sample = 0.0
+        self._previous = None
+        self._pending = None
+        self.reads = []
+        self.last_serial = None
+        self.labels = deque(maxlen=MAX_RECENT_LABELS)
+        self.finished = 0
+        self.status = "waiting"
+        self.counts = {"frames": 0, "sampled": 0, "rejected": 0, "moving": 0, "no_label": 0, "read": 0}
+
+    def offer(self, frame):
+        """Consider one RGB or grayscale frame; returns immediately, reading happens on the OCR executor."""
+        now = time.monotonic()
+        with self._lock:
+            self.counts["frames"] += 1
+            if now - self._last_sample < self.sample_interval:
+                return
+            if self._pending is not None and not self._pending.done():
+                # Still reading the previous frame; newer frames will be fresher by the time it is free
+                return
+            self._last_sample = now
+            self.counts["sampled"] += 1
+
+        gray = small_gray(frame)
+        moved = motion(self._previous, gray)
+        self._previous = gray
+        problem, _ = check_gray(gray)
+        if problem:
+            self._skip(problem, "rejected")
+        elif moved is None or moved > STREAM_MAX_MOTION:
+            self._skip("moving")
+        elif not find_text_regions(gray):
+            self._skip("no_label")
+        else:
+            with self._lock:
+                self.status = "reading"
+                self._pending = get_ocr_executor().submit(self._read, frame)
+
+    def _skip(self, reason, count=None):
+        with self._lock:
+            self.counts[count or reason] += 1
+            self.status = reason
+
+    def _read(self, frame):
+        candidates, _ = read_capture(frame, True, self.device_name)
+        pick = best_serial(candidates)
+        finished = None
+        with self._lock:
+            self.counts["read"] += 1
+            if pick is None or pick["serial"] == self.last_serial:
+                # Nothing readable, or the label just finished is still in front of the camera
+                self.status = "waiting"
+                return
+            self.reads = (self.reads + [pick])[-self.reads_needed:]
+            serials = [read["serial"] for read in self.reads]
+            if len(serials) == self.reads_needed and len(set(serials)) == 1:
+                finished = (serials, True)
+                self.labels.append({"serial": serials[0], "time": time.time(), "reads": self.reads})
+                self.finished += 1
+                self.last_serial = serials[0]
+                self.reads = []
+                self.status = "finished"
+            else:
+                self.status = "reading"
+        if finished and self.on_label:
+            self.on_label(*finished)
+
+    def snapshot(self):
+        """Return a copy of the scanner state for display."""
+        with self._lock:
+            return {
+                "status": self.status,
+                "reads": [read["serial"] for read in self.reads],
+                "labels": list(self.labels),
+                "finished": self.finished,
+                "counts": dict(self.counts),
+            }
+
+
+def replay_frames(paths, fps, hold):
+    """Yield frames from a video file, or from photos each held for hold seconds with a moving transition."""
+    if len(paths) == 1 and not paths[0].lower().endswith(('.jpg', '.jpeg', '.png')):
+        capture = cv2.VideoCapture(paths[0])
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                return
+            # OpenCV delivers BGR
+            yield cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY if DECODE_MODE == "L" else cv2.COLOR_BGR2RGB)
+
+    for path in paths:
+        image = load_image(path)
+        # A few frames of a label sliding in, like the operator moving it under the camera
+        for shift in range(6, 0, -1):
+            yield np.roll(image, shift * image.shape[1] // 20, axis=1)
+        for _ in range(int(hold * fps)):
+            yield image
+
+
+def replay(paths, fps=15.0, hold=4.0, device_name="replay"):
+    """Feed frames through a LabelScanner in real time and print each finished label."""
+    start = time.monotonic()
+    scanner = LabelScanner(device_name, on_label=lambda results, _: print(
+        f"{time.monotonic() - start:6.1f}s  label {results[0]}"))
+    for i, frame in enumerate(replay_frames(paths, fps, hold)):
+        # Pace frames like a camera would deliver them
+        delay = start + i / fps - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        scanner.offer(frame)
+    get_ocr_executor().shutdown(wait=True)
+    elapsed = time.monotonic() - start
+    state = scanner.snapshot()
+    print(f"{state['finished']} labels in {elapsed:.1f}s ({state['finished'] / elapsed * 60:.1f} labels/min); "
+          f"frames {state['counts']}")
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['replay'])
+    parser.add_argument('paths', nargs='+', help="a video file, or label photos shown one after another")
+    parser.add_argument('--fps', type=float, default=15.0)
+    parser.add_argument('--hold', type=float, default=4.0, help="seconds each photo stays in front of the camera")
+    parser.add_argument('--device', default="replay")
+    args = parser.parse_args()
+    replay(args.paths, args.fps, args.hold, args.device)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import barcode
+
+# The fake barcode: a dark block on a white capture
+BLOCK = (200, 120, 160, 60)
+
+
+def capture():
+    image = np.full((360, 640), 255, np.uint8)
+    x, y, w, h = BLOCK
+    image[y:y + h, x:x + w] = 0
+    return image
+
+
+def fake_decode(variant):
+    """Find the dark block in a variant, as pyzbar would report a barcode's rect."""
+    ys, xs = np.nonzero(variant < 128)
+    if not len(xs):
+        return []
+    rect = SimpleNamespace(left=int(xs.min()), top=int(ys.min()),
+                           width=int(xs.max() - xs.min() + 1), height=int(ys.max() - ys.min() + 1))
+    return [SimpleNamespace(data=b"SN 1234567", rect=rect)]
+
+
+@pytest.fixture
+def decoder(monkeypatch):
+    monkeypatch.setattr(barcode, "_decode", fake_decode)
+    monkeypatch.setattr(barcode, "_hints", barcode.OrderedDict())
+
+
+@pytest.mark.parametrize("name", sorted(barcode.VARIANTS))
+def test_variant_boxes_map_back_to_the_capture(decoder, name):
+    image = capture()
+    candidate, = barcode.decode_variant(name, image, image.shape)
+    assert candidate["text"] == "1234567"
+    x, y, w, h = candidate["box"]
+    bx, by, bw, bh = BLOCK
+    # Same centre, and the box holds the whole block (rotated variants return a looser box)
+    assert abs((x + w / 2) - (bx + bw / 2)) <= 3 and abs((y + h / 2) - (by + bh / 2)) <= 3, candidate["box"]
+    assert x <= bx + 2 and y <= by + 2 and x + w >= bx + bw - 2 and y + h >= by + bh - 2, candidate["box"]
+    if not name.startswith("rotate"):
+        assert np.allclose(candidate["box"], BLOCK, atol=3), candidate["box"]
+
+
+def test_crop_origin_is_added_back(decoder):
+    image = capture()
+    candidate, = barcode.decode_variant("gray", image[100:300, 150:500], image.shape, origin=(150, 100))
+    assert candidate["box"] == list(BLOCK)
+
+
+def test_device_hint_decodes_a_crop_next_time(decoder):
+    image = capture()
+    first = barcode.decode_barcodes(image, "dev")
+    assert first[0]["box"] == list(BLOCK)
+    name, box = barcode.device_hint("dev")
+    assert box == BLOCK and name in barcode.VARIANTS
+    assert barcode.decode_barcodes(image, "dev")[0]["box"] == list(BLOCK)
+
+
+def test_boxes_are_clipped_to_the_capture():
+    rect = SimpleNamespace(left=-10, top=-5, width=50, height=40)
+    matrix = np.array([[2, 0, 0], [0, 2, 0]], np.float64)
+    assert barcode.to_capture_box(rect, matrix, 15, 100) == [0, 0, 15, 17]
@@ -0,0 +1,60 @@
+import io
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from frame_quality import check_frame
+from ocr_pipeline import load_image
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+
+@pytest.fixture(scope="module")
+def label():
+    return load_image(os.path.join(FIXTURES, 'label_1280x720_0.jpg'))
+
+
+def test_fixture_label_passes(label):
+    problem, quality = check_frame(label)
+    assert problem is None, quality
+
+
+@pytest.mark.parametrize("problem, damage", [
+    ("blurred", lambda image: cv2.GaussianBlur(image, (0, 0), 6)),
+    ("too_dark", lambda image: (image * 0.1).astype(np.uint8)),
+    ("too_bright", lambda image: np.clip(image.astype(int) + 200, 0, 255).astype(np.uint8)),
+    ("low_contrast", lambda image: (128 + (image.astype(int) - 128) // 10).astype(np.uint8)),
+    ("glare", lambda image: np.where(np.arange(image.shape[1]) < image.shape[1] // 5, 255, image).astype(np.uint8)),
+])
+def test_damaged_frames_are_rejected(label, problem, damage):
+    assert check_frame(damage(label))[0] == problem
+
+
+class _State(dict):
+    __getattr__ = dict.get
+    __setattr__ = dict.__setitem__
+
+
+def _jpeg(image):
+    return io.BytesIO(cv2.imencode(".jpg", cv2.cvtColor(image, cv2.COLOR_RGB2BGR))[1].tobytes())
+
+
+def test_rejected_capture_is_not_stored(label, monkeypatch):
+    import FINAL
+
+    errors = []
+    monkeypatch.setattr(FINAL.st, "session_state", _State())
+    monkeypatch.setattr(FINAL.st, "error", errors.append)
+    monkeypatch.setattr(FINAL.st, "caption", lambda *args: None)
+    image, image_hash = FINAL.accept_capture(_jpeg(label), None)
+    assert image.shape == label.shape
+
+    dark = (label * 0.1).astype(np.uint8)
+    assert FINAL.accept_capture(_jpeg(dark), None) is None
+    # The photo stays in the camera widget; a rerun reuses the verdict without decoding it again
+    monkeypatch.setattr(FINAL, "load_image", lambda img_file: pytest.fail("rejected capture decoded again"))
+    assert FINAL.accept_capture(_jpeg(dark), None) is None
+    assert errors == [FINAL.QUALITY_PROBLEMS["too_dark"]] * 2
+    assert FINAL.get_image_store().stats()["entries"] == 0
@@ -0,0 +1,47 @@
+import time
+from collections import deque
+
+import numpy as np
+
+from image_store import ImageStore
+from label_record import LabelRecord, deep_size
+
+
+def test_evicts_least_recently_used_beyond_max_bytes():
+    store = ImageStore(max_bytes=10, ttl=60)
+    store.put("a", b"1234")
+    store.put("b", b"1234")
+    assert store.get("a") == b"1234"   # a is now the most recently used
+    store.put("c", b"1234")
+    assert store.get("b") is None
+    assert store.get("a") == b"1234" and store.get("c") == b"1234"
+    assert store.stats()["bytes"] == 8 and store.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    store = ImageStore(max_bytes=100, ttl=0.01)
+    store.put("a", b"1")
+    time.sleep(0.02)
+    assert store.get("a") is None
+    store.put("b", b"2")
+    assert store.stats()["entries"] == 1 and store.stats()["bytes"] == 1
+
+
+def test_discard_and_replace_keep_byte_count():
+    store = ImageStore(max_bytes=100, ttl=60)
+    store.put("a", b"12")
+    store.put("a", b"123")
+    store.put("b", b"1")
+    store.discard(["a", "missing"])
+    assert store.stats() == {"entries": 1, "bytes": 1, "evictions": 0, "expirations": 0}
+
+
+def test_label_record_keys():
+    record = LabelRecord("dev")
+    record.image_hashes[0] = "abc"
+    assert record.image_keys() == ["abc/preview", "abc/original", "abc/overlay"]
+
+
+def test_deep_size_walks_deques():
+    frames = deque([np.zeros(1000, np.uint8), np.zeros(1000, np.uint8)], maxlen=5)
+    assert deep_size(frames) >= 2000
@@ -0,0 +1,45 @@
+import json
+
+import numpy as np
+
+import ocr_backends
+from ocr_cache import OCRCache, image_key
+from ocr_pipeline import OCR_PARAMS
+
+
+def test_key_depends_on_pixels_and_params():
+    image = np.zeros((4, 4), np.uint8)
+    key = image_key(image, **OCR_PARAMS)
+    assert key == image_key(image.copy(), **OCR_PARAMS)
+    assert key != image_key(image + 1, **OCR_PARAMS)
+    assert key != image_key(image, **{**OCR_PARAMS, "roi": False})
+    # A non-contiguous view hashes like its copy
+    wide = np.zeros((4, 8), np.uint8)
+    assert image_key(wide[:, ::2], **OCR_PARAMS) == key
+
+
+def test_key_depends_on_backend_and_models(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_backends, "ONNX_MODEL_DIR", str(tmp_path))
+    image = np.zeros((4, 4), np.uint8)
+    keys = {image_key(image, **{**OCR_PARAMS, "backend": ocr_backends.backend_fingerprint(backend)})
+            for backend in ("easyocr", "onnx")}
+    (tmp_path / "models.sha256.json").write_text(json.dumps({name: "0" * 64 for name in ocr_backends.ONNX_FILES}))
+    keys.add(image_key(image, **{**OCR_PARAMS, "backend": ocr_backends.backend_fingerprint("onnx")}))
+    assert len(keys) == 3
+
+
+def test_disk_tier_survives_a_new_process(tmp_path):
+    OCRCache(cache_dir=str(tmp_path)).put("ab12", [{"text": "1234567"}])
+    cache = OCRCache(cache_dir=str(tmp_path))
+    assert cache.get("ab12") == [{"text": "1234567"}]
+    assert cache.get("missing") is None
+    assert cache.stats() == {"entries": 1, "hits": 0, "disk_hits": 1, "misses": 1}
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = OCRCache(max_entries=2, cache_dir=None)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert (cache.get("b"), cache.get("a"), cache.get("c")) == (None, 1, 3)
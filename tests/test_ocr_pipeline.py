@@ -0,0 +1,90 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from ocr_pipeline import (MATCH, NO_MATCH, best_serial, build_row, compare_results, decode_capture,
+                          load_image, select_serials, serial_candidates)
+
+
+def reading(text, confidence, height=40, source=None):
+    candidate = {"text": text, "confidence": confidence, "box": [0, 0, 10 * len(text), height]}
+    if source:
+        candidate["source"] = source
+    return candidate
+
+
+def test_part_number_counts_as_its_serial_but_scores_lower():
+    picks = serial_candidates([reading("201475597971", 0.9)])
+    assert picks["5597971"]["score"] == pytest.approx(0.9 * 0.8)
+    assert best_serial([reading("5597971", 0.9), reading("201475597971", 0.95)])["text"] == "5597971"
+
+
+def test_short_small_and_weak_readings_are_ignored():
+    picks = serial_candidates([
+        reading("123456", 0.99),             # too short to be a serial
+        reading("7654321", 0.9, height=4),   # far smaller than the tallest text
+        reading("1111111", 0.1),             # below MIN_SERIAL_SCORE
+        reading("2222222", 0.9, height=40),
+    ])
+    assert set(picks) == {"7654321", "2222222"}
+    assert picks["7654321"]["score"] < picks["2222222"]["score"]
+
+
+def test_consensus_wins_over_a_single_confident_misread():
+    captures = [
+        [reading("1234567", 0.7), reading("1234561", 0.95)],
+        [reading("1234567", 0.8)],
+        [reading("1234567", 1.0, source="barcode")],
+    ]
+    selections = select_serials(captures)
+    assert [selection["serial"] for selection in selections] == ["1234567"] * 3
+    assert not any(selection["retake"] for selection in selections)
+    assert selections[2]["source"] == "barcode"
+    assert compare_results(captures) == (["1234567"] * 3, True)
+
+
+def test_disagreeing_and_empty_captures_are_flagged_for_retake():
+    captures = [[reading("1234567", 0.9)], [reading("1234567", 0.8)], [reading("7654321", 0.9)]]
+    selections = select_serials(captures)
+    assert [selection["retake"] for selection in selections] == [False, False, True]
+    assert compare_results(captures) == (["1234567", "1234567", "7654321"], False)
+
+    results, all_match = compare_results([[reading("1234567", 0.9)], [], [reading("1234567", 0.9)]])
+    assert results == ["1234567", "N/A", "1234567"] and not all_match
+    assert compare_results([[], [], []]) == (["N/A"] * 3, False)
+
+
+def test_build_row():
+    assert build_row("dev", ["1"] * 3, True, "t") == ["dev", "1", "1", "1", MATCH, "t"]
+    assert build_row("dev", ["1", "2", "1"], False, "t")[4] == NO_MATCH
+
+
+def encoded(image, fmt):
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt)
+    buffer.seek(0)
+    return buffer
+
+
+def test_decode_straight_to_gray_and_read_only():
+    image = load_image(encoded(Image.new("RGB", (64, 48), (200, 100, 50)), "JPEG"))
+    assert image.shape == (48, 64) and image.dtype == np.uint8
+    assert not image.flags.writeable
+
+
+def test_decode_reduces_large_captures():
+    jpeg = encoded(Image.new("RGB", (4096, 2048), (255, 255, 255)), "JPEG")
+    assert decode_capture(jpeg, "L", 1024).size == (1024, 512)
+    png = encoded(Image.new("RGB", (4096, 2048), (255, 255, 255)), "PNG")
+    assert decode_capture(png, "L", 1024).size == (1024, 512)
+    # Smaller than twice max_side: left at full size
+    assert decode_capture(encoded(Image.new("RGB", (1500, 800)), "JPEG"), "L", 1024).size == (1500, 800)
+
+
+def test_decode_drops_alpha_and_keeps_rgb_order():
+    rgba = encoded(Image.new("RGBA", (32, 32), (255, 0, 0, 128)), "PNG")
+    image = np.asarray(decode_capture(rgba, "RGB", 0))
+    assert image.shape == (32, 32, 3)
+    assert tuple(image[0, 0]) == (255, 0, 0)
@@ -0,0 +1,23 @@
+import reader_pool
+from tracing import render_metrics
+
+
+def test_pool_figures_are_on_metrics(monkeypatch):
+    monkeypatch.setattr(reader_pool, "verify_backend", lambda: None)
+    monkeypatch.setattr(reader_pool, "create_reader", lambda languages: object())
+    pool = reader_pool.ReaderPool(size=2)
+    monkeypatch.setattr(reader_pool, "_pool", pool)
+    with pool.lease():
+        assert 'ocr_reader_pool_idle 1' in render_metrics()
+    with pool.lease():
+        pass
+    metrics = render_metrics()
+    assert 'ocr_reader_pool_size 2' in metrics
+    assert 'ocr_reader_pool_leases_total 2' in metrics
+    assert 'ocr_reader_pool_lease_wait_seconds_count 2' in metrics
+    assert 'ocr_reader_pool_lease_wait_seconds_bucket{le="+Inf"} 2' in metrics
+
+
+def test_no_pool_figures_before_the_pool_exists(monkeypatch):
+    monkeypatch.setattr(reader_pool, "_pool", None)
+    assert "ocr_reader_pool" not in render_metrics()
@@ -0,0 +1,50 @@
+import csv
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from ocr_pipeline import load_image
+from roi import crop_regions, draw_roi_overlay, find_text_regions, pad_box
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+with open(os.path.join(FIXTURES, 'manifest.csv'), newline='') as f:
+    NAMES = [row['image'] for row in csv.DictReader(f)]
+
+
+def test_finds_a_printed_line_where_it_was_drawn():
+    image = np.full((480, 640), 230, np.uint8)
+    cv2.putText(image, "1234567", (150, 260), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 20, 3, cv2.LINE_AA)
+    ys, xs = np.nonzero(image < 128)
+    (x, y, w, h), = find_text_regions(image)
+    assert x <= xs.min() and y <= ys.min() and x + w > xs.max() and y + h > ys.max()
+    # Padded, but still one line rather than the frame
+    assert h < 2 * (ys.max() - ys.min()) and w < 1.5 * (xs.max() - xs.min())
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_fixture_regions_are_lines_in_reading_order(name):
+    image = load_image(os.path.join(FIXTURES, name))
+    boxes = find_text_regions(image)
+    assert boxes, name
+    assert boxes == sorted(boxes, key=lambda box: (box[1], box[0]))
+    height, width = image.shape[:2]
+    for x, y, w, h in boxes:
+        assert x >= 0 and y >= 0 and x + w <= width and y + h <= height
+        assert w > h
+
+
+def test_pad_box_clips_to_the_frame():
+    assert pad_box((10, 10, 100, 20), 640, 480) == (5, 5, 110, 30)
+    assert pad_box((0, 470, 640, 10), 640, 480) == (0, 467, 640, 13)
+
+
+def test_crops_are_views_and_the_overlay_a_copy():
+    image = np.zeros((100, 200), np.uint8)
+    image.flags.writeable = False
+    crop, = crop_regions(image, [(10, 20, 30, 40)])
+    assert crop.shape == (40, 30) and np.shares_memory(crop, image)
+    overlay = draw_roi_overlay(image, [(10, 20, 30, 40)])
+    assert overlay.shape == (100, 200, 3) and overlay.any() and not image.any()
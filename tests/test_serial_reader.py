@@ -0,0 +1,27 @@
+import numpy as np
+
+from serial_reader import SerialReader
+
+LINES = {
+    0: ("5260181", 0.64, [2, 2, 70, 20]),
+    1: ("20303101", 0.0, [2, 2, 80, 16]),
+    2: ("42", 0.9, [2, 2, 20, 16]),
+}
+
+
+def test_confidence_comes_from_the_serial_line(monkeypatch):
+    reader = SerialReader(templates=None)
+    crops = iter(range(3))
+    monkeypatch.setattr(reader, "read_line", lambda crop: LINES[next(crops)])
+    image = np.zeros((100, 100), np.uint8)
+    candidates, confidence = reader.readtext(image, [(0, 0, 90, 30), (0, 40, 90, 30), (0, 80, 90, 20)])
+    # A misread part-number line does not force the EasyOCR fallback
+    assert confidence == 0.64
+    assert [candidate["text"] for candidate in candidates] == ["5260181", "20303101"]
+    assert candidates[1]["box"] == [2, 42, 80, 16]
+
+
+def test_no_serial_line_means_no_confidence(monkeypatch):
+    reader = SerialReader(templates=None)
+    monkeypatch.setattr(reader, "read_line", lambda crop: ("1234", 0.9, [0, 0, 10, 10]))
+    assert reader.readtext(np.zeros((20, 20), np.uint8), [(0, 0, 20, 20)])[1] == 0.0
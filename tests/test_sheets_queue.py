@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from google.auth.exceptions import RefreshError, TransportError
+
+import sheets_queue
+from row_spool import RowSpool
+from sheets_queue import SheetsWriteQueue, is_retryable
+from tracing import render_metrics
+
+
+class APIError(Exception):
+    """Stands in for gspread's APIError, which carries the HTTP response."""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.response = SimpleNamespace(status_code=status)
+
+
+class FakeClient:
+    def __init__(self, delay=0.0):
+        self.rows = []
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def append_rows(self, rows):
+        time.sleep(self.delay)
+        with self.lock:
+            self.rows.extend(rows)
+
+    def worksheet(self, sheet_name):
+        return SimpleNamespace(append_rows=self.append_rows)
+
+
+@pytest.mark.parametrize("exc", [
+    TransportError("token endpoint unreachable"),
+    RefreshError("invalid token response"),
+    ValueError("Environment variable GCP_PROJECT_ID is not set."),
+    ConnectionError("connection reset"),
+    APIError(408), APIError(429), APIError(500), APIError(503),
+])
+def test_outages_are_retried(exc):
+    assert is_retryable(exc)
+
+
+@pytest.mark.parametrize("status", [400, 403, 404])
+def test_definitive_rejections_are_parked(status):
+    assert not is_retryable(APIError(status))
+
+
+def test_spool_keeps_order_and_drains(tmp_path):
+    spool = RowSpool(str(tmp_path / "spool.db"))
+    for i in range(3):
+        spool.append("sheet", ["device", i])
+    spool.append("other", ["device", 9])
+    batch = spool.pending("sheet", 2)
+    assert [row for _, row in batch] == [["device", 0], ["device", 1]]
+    spool.mark_drained([row_id for row_id, _ in batch])
+    assert spool.count("sheet") == 1
+    assert sorted(spool.sheets()) == ["other", "sheet"]
+
+
+def test_drained_rows_give_space_back(tmp_path, monkeypatch):
+    monkeypatch.setattr("row_spool.COMPACT_EVERY", 100)
+    spool = RowSpool(str(tmp_path / "spool.db"))
+    assert spool._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    for i in range(200):
+        spool.append("sheet", ["x" * 200, i])
+    spool._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size = os.path.getsize(spool.path)
+    spool.mark_drained([row_id for row_id, _ in spool.pending("sheet", 200)])
+    assert spool._conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    assert os.path.getsize(spool.path) < size
+
+
+def test_existing_spool_switches_to_incremental_vacuum(tmp_path):
+    path = str(tmp_path / "spool.db")
+    # A spool created the old way, with WAL set before auto_vacuum
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("CREATE TABLE old (x)")
+    conn.close()
+    spool = RowSpool(path)
+    assert spool._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+def test_parked_rows_are_requeued(tmp_path):
+    spool = RowSpool(str(tmp_path / "spool.db"))
+    spool.append("sheet", ["device", 1])
+    spool.mark_failed([row_id for row_id, _ in spool.pending("sheet", 10)], "APIError(403)")
+    assert (spool.count("sheet"), spool.count_failed("sheet"), spool.sheets()) == (0, 1, [])
+    assert spool.requeue_failed() == 1
+    assert spool.count("sheet") == 1
+
+
+def test_claimed_rows_are_skipped_until_the_lease_lapses(tmp_path):
+    spool = RowSpool(str(tmp_path / "spool.db"))
+    for i in range(3):
+        spool.append("sheet", ["device", i])
+    first = spool.claim("sheet", 2, "a")
+    assert [row for _, row in first] == [["device", 0], ["device", 1]]
+    assert [row for _, row in spool.claim("sheet", 10, "b")] == [["device", 2]]
+    assert spool.claim("sheet", 10, "c") == []
+    # An uploader that stopped renewing loses its rows to the next one
+    assert [row_id for row_id, _ in spool.claim("sheet", 10, "c", lease=0)] == [1, 2, 3]
+    assert not spool.renew([row_id for row_id, _ in first], "a")
+    spool.release([1, 2, 3], "c")
+    assert len(spool.claim("sheet", 10, "a")) == 3
+
+
+def test_queues_sharing_a_spool_send_each_row_once(tmp_path, monkeypatch):
+    path = str(tmp_path / "spool.db")
+    client = FakeClient(delay=0.05)
+    monkeypatch.setattr(sheets_queue, "get_sheets_client", lambda: client)
+    # Two uploaders on one file, as with verify_batch --sheet next to the app
+    queues = [SheetsWriteQueue("sheet", RowSpool(path), batch_size=2, flush_interval=0.01) for _ in range(2)]
+    for i in range(5):
+        queues[i % 2].put(["device", i])
+    for write_queue in queues:
+        write_queue.close(timeout=10)
+    assert sorted(client.rows) == [["device", i] for i in range(5)]
+    assert RowSpool(path).count() == 0
+
+
+def test_rows_survive_outage_and_restart(tmp_path, monkeypatch):
+    path = str(tmp_path / "spool.db")
+    monkeypatch.setattr(sheets_queue, "MAX_BACKOFF", 0.01)
+
+    def unreachable():
+        raise TransportError("token endpoint unreachable")
+
+    monkeypatch.setattr(sheets_queue, "get_sheets_client", unreachable)
+    write_queue = SheetsWriteQueue("sheet", RowSpool(path), batch_size=10, flush_interval=0.05)
+    write_queue.put(["device", 1])
+    write_queue.put(["device", 2])
+    write_queue.close(timeout=10)
+    assert not write_queue._thread.is_alive()
+    assert write_queue.rows_failed == 0
+
+    # A new process opens the same spool once Sheets is reachable again
+    client = FakeClient()
+    monkeypatch.setattr(sheets_queue, "get_sheets_client", lambda: client)
+    spool = RowSpool(path)
+    assert (spool.count("sheet"), spool.count_failed()) == (2, 0)
+    SheetsWriteQueue("sheet", spool, flush_interval=0.05).close(timeout=10)
+    assert client.rows == [["device", 1], ["device", 2]]
+    assert spool.count() == 0
+
+
+def test_resume_requeues_parked_rows_once(tmp_path, monkeypatch):
+    spool = RowSpool(str(tmp_path / "spool.db"))
+    spool.append("sheet", ["device", 1])
+    spool.mark_failed([row_id for row_id, _ in spool.pending("sheet", 10)], "APIError(403)")
+    client = FakeClient()
+    monkeypatch.setattr(sheets_queue, "get_sheets_client", lambda: client)
+    monkeypatch.setattr(sheets_queue, "get_row_spool", lambda: spool)
+    monkeypatch.setattr(sheets_queue, "_queues", {})
+    monkeypatch.setattr(sheets_queue, "_requeued", False)
+
+    sheets_queue.resume_spooled_uploads()
+    sheets_queue._queues["sheet"].close(timeout=10)
+    assert client.rows == [["device", 1]]
+    assert spool.count_failed() == 0
+
+
+def test_queue_figures_are_on_metrics(tmp_path, monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(sheets_queue, "get_sheets_client", lambda: client)
+    write_queue = SheetsWriteQueue('ocr "data"', RowSpool(str(tmp_path / "spool.db")), flush_interval=0.01)
+    monkeypatch.setattr(sheets_queue, "_queues", {write_queue.sheet_name: write_queue})
+    write_queue.put(["device", 1])
+    write_queue.close(timeout=10)
+    metrics = render_metrics()
+    assert 'ocr_sheets_queue_depth{sheet="ocr \\"data\\""} 0' in metrics
+    assert 'ocr_sheets_rows_flushed_total{sheet="ocr \\"data\\""} 1' in metrics
+    assert 'ocr_sheets_flush_seconds_count{sheet="ocr \\"data\\""} 1' in metrics
+    assert "# TYPE ocr_sheets_flush_seconds histogram" in metrics
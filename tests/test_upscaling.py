@@ -0,0 +1,49 @@
+import csv
+import os
+
+import numpy as np
+import pytest
+
+from ocr_pipeline import load_image
+from roi import crop_regions, find_text_regions
+from upscaling import IDEAL_TEXT_HEIGHT, estimate_text_height, scale_for_height, upscale_regions
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+with open(os.path.join(FIXTURES, 'manifest.csv'), newline='') as f:
+    NAMES = [row['image'] for row in csv.DictReader(f)]
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_region_crops_are_scaled_by_their_text(name):
+    image = load_image(os.path.join(FIXTURES, name))
+    crops = crop_regions(image, find_text_regions(image))
+    heights = [estimate_text_height(crop, line=True) for crop in crops]
+    # The digits fill most of a line crop and must still count as characters
+    assert any(heights), name
+    for crop, height, resized in zip(crops, heights, upscale_regions(image, crops)):
+        if height:
+            scaled = height * resized.shape[0] / crop.shape[0]
+            assert IDEAL_TEXT_HEIGHT[0] - 2 <= scaled <= IDEAL_TEXT_HEIGHT[1], (name, height, resized.shape)
+
+
+def test_phone_photo_crops_are_not_enlarged():
+    image = load_image(os.path.join(FIXTURES, 'label_3024x4032_0.jpg'))
+    crops = crop_regions(image, find_text_regions(image))
+    for crop, resized in zip(crops, upscale_regions(image, crops)):
+        assert resized.shape[0] < crop.shape[0]
+
+
+def test_unmeasurable_crop_uses_the_frame_text_height():
+    image = load_image(os.path.join(FIXTURES, 'label_3024x4032_0.jpg'))
+    blank = np.full((100, 400), 230, np.uint8)
+    resized, = upscale_regions(image, [blank])
+    assert resized.shape[0] == int(100 * scale_for_height(estimate_text_height(image), blank.shape))
+
+
+def test_scale_for_height():
+    assert scale_for_height(40, (100, 400)) == 1.0
+    assert scale_for_height(20, (100, 400)) == 2.0
+    assert scale_for_height(None, (100, 400)) == 2.0
+    # Never past the recognizer's canvas
+    assert scale_for_height(10, (100, 2000)) == pytest.approx(2560 / 2000)
@@ -0,0 +1,170 @@
+"""Lightweight per-stage timing spans and a Prometheus-style /metrics exporter.
+
+Spans are recorded only when OCR_TRACING=1 (for the process-wide histograms)
+or when a per-label trace is active (for the debug panel). Otherwise span()
+returns a shared no-op context manager. Modules with their own figures (the
+Sheets write queues, the reader pool) add them to /metrics with
+register_metrics().
+"""
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRACING_ENABLED = os.getenv('OCR_TRACING', '0') == '1'
+METRICS_PORT = os.getenv('OCR_METRICS_PORT')
+
+# Histogram bucket upper bounds in seconds, from a fast resize up to a slow Sheets call
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NOOP = nullcontext()
+_current_trace = contextvars.ContextVar('ocr_trace', default=None)
+_histograms = {}
+_histograms_lock = threading.Lock()
+_collectors = []
+_server = None
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count for one stage."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def copy(self):
+        """A snapshot that later observations do not change."""
+        histogram = Histogram()
+        histogram.counts, histogram.total, histogram.count = list(self.counts), self.total, self.count
+        return histogram
+
+
+def observe(stage, seconds):
+    """Add one timing to the process-wide histogram for stage."""
+    with _histograms_lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = Histogram()
+        histogram.observe(seconds)
+
+
+@contextmanager
+def _timed(stage, trace):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if TRACING_ENABLED:
+            observe(stage, elapsed)
+        if trace is not None:
+            # list.append is atomic, so OCR worker threads can share the label's trace
+            trace.append((stage, elapsed))
+
+
+def span(stage):
+    """Time the with-block as stage; free when tracing is off and no trace is active."""
+    trace = _current_trace.get()
+    if not TRACING_ENABLED and trace is None:
+        return _NOOP
+    return _timed(stage, trace)
+
+
+@contextmanager
+def use_trace(trace):
+    """Record spans from this thread into trace, a list of (stage, seconds) pairs."""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def register_metrics(collect):
+    """Add collect() to /metrics.
+
+    collect returns (name, type, help, samples) tuples, type being "gauge", "counter"
+    or "histogram" and samples a list of (labels dict, value) pairs; a histogram's
+    value is a Histogram.
+    """
+    _collectors.append(collect)
+
+
+def _labels(labels, **extra):
+    """Format {key: value} as Prometheus labels, escaping backslashes and quotes in values."""
+    pairs = {**labels, **extra}
+    if not pairs:
+        return ""
+    escape = lambda value: str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in pairs.items()) + "}"
+
+
+def _histogram_lines(name, labels, histogram):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(BUCKETS + (float('inf'),), histogram.counts):
+        cumulative += count
+        le = "+Inf" if bound == float('inf') else repr(bound)
+        lines.append(f'{name}_bucket{_labels(labels, le=le)} {cumulative}')
+    lines.append(f'{name}_sum{_labels(labels)} {histogram.total}')
+    lines.append(f'{name}_count{_labels(labels)} {histogram.count}')
+    return lines
+
+
+def render_metrics():
+    """Return the stage histograms and every registered metric in the Prometheus text format."""
+    lines = [
+        "# HELP ocr_stage_seconds Time spent in each capture, OCR and Sheets stage.",
+        "# TYPE ocr_stage_seconds histogram",
+    ]
+    with _histograms_lock:
+        for stage, histogram in sorted(_histograms.items()):
+            lines.extend(_histogram_lines("ocr_stage_seconds", {"stage": stage}, histogram))
+    for collect in list(_collectors):
+        for name, kind, help_text, samples in collect():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                if kind == "histogram":
+                    lines.extend(_histogram_lines(name, labels, value))
+                else:
+                    lines.append(f"{name}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        payload = render_metrics().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=None, host='0.0.0.0'):
+    """Serve /metrics on a background thread; does nothing without a port or if already running."""
+    global _server
+    port = port or METRICS_PORT
+    if not port or _server is not None:
+        return _server
+    with _histograms_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
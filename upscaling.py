@@ -0,0 +1,103 @@
+import cv2
+import numpy as np
+
+from roi import to_gray
+
+# EasyOCR resizes recognizer crops to 64 px high; digits read best a little below that
+TARGET_TEXT_HEIGHT = 40
+# Text already inside this range is left at its native size
+IDEAL_TEXT_HEIGHT = (28, 64)
+MIN_SCALE, MAX_SCALE = 0.25, 3.0
+# readtext() shrinks anything larger than its 2560 px canvas, so never grow past it
+MAX_LONG_SIDE = 2560
+# Character height is estimated on a copy no wider than this
+ESTIMATE_WIDTH = 1024
+# Tallest blob counted as a character, as a fraction of the image height: a full frame
+# holds many lines, while a region crop is one line whose digits fill most of it
+FRAME_MAX_FRACTION = 1 / 3
+LINE_MAX_FRACTION = 0.9
+
+
+def estimate_text_height(image, line=False):
+    """Estimate the median character height in pixels with a cheap connected-components pass.
+
+    Pass line=True for a single-line region crop. Returns None when no
+    character-shaped components are found.
+    """
+    gray = to_gray(image)
+    height, width = gray.shape[:2]
+    shrink = min(ESTIMATE_WIDTH / width, 1.0)
+    if shrink < 1.0:
+        gray = cv2.resize(gray, (int(width * shrink), int(height * shrink)), interpolation=cv2.INTER_AREA)
+
+    # Label digits are dark on light; invert so they become the foreground
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    max_height = gray.shape[0] * (LINE_MAX_FRACTION if line else FRAME_MAX_FRACTION)
+
+    heights = []
+    for x, y, w, h, area in stats[1:count]:
+        # Keep blobs shaped like a digit: taller than wide, reasonably filled, not the whole frame
+        if h < 3 or h > max_height:
+            continue
+        if not 0.15 <= w / h <= 1.2:
+            continue
+        if area < 0.15 * w * h:
+            continue
+        heights.append(h)
+
+    if len(heights) < 3:
+        return None
+    return float(np.median(heights)) / shrink
+
+
+def choose_scale_factor(image, text_height=None, line=False):
+    """Pick the smallest scale that puts the digits into the recognizer's ideal height range."""
+    if text_height is None:
+        text_height = estimate_text_height(image, line)
+    return scale_for_height(text_height, image.shape)
+
+
+def scale_for_height(text_height, shape):
+    """Scale that brings text_height into the ideal range for an image of this shape; 2x when unknown."""
+    height, width = shape[:2]
+    max_scale = min(MAX_SCALE, MAX_LONG_SIDE / max(height, width))
+
+    if text_height is None:
+        # Nothing measurable: keep the old 2x behaviour, within the canvas budget
+        scale = 2.0
+    elif IDEAL_TEXT_HEIGHT[0] <= text_height <= IDEAL_TEXT_HEIGHT[1]:
+        scale = 1.0
+    else:
+        scale = TARGET_TEXT_HEIGHT / text_height
+    return float(np.clip(scale, MIN_SCALE, max(max_scale, MIN_SCALE)))
+
+
+def upscale_image(image, scale_factor=None, line=False):
+    """Resize the image; by default the factor is chosen from the measured text height."""
+    if scale_factor is None:
+        scale_factor = choose_scale_factor(image, line=line)
+    if scale_factor == 1:
+        return image
+    height, width = image.shape[:2]
+    new_height, new_width = int(height * scale_factor), int(width * scale_factor)
+    interpolation = cv2.INTER_CUBIC if scale_factor > 1 else cv2.INTER_AREA
+    return cv2.resize(image, (new_width, new_height), interpolation=interpolation)
+
+
+def upscale_regions(image, crops):
+    """Resize region crops of image, each by its own text height.
+
+    A crop with nothing measurable, such as a barcode, uses the full frame's text
+    height instead, measured at most once.
+    """
+    frame_height = None
+    resized = []
+    for crop in crops:
+        text_height = estimate_text_height(crop, line=True)
+        if text_height is None:
+            if frame_height is None:
+                frame_height = [estimate_text_height(image)]
+            text_height = frame_height[0]
+        resized.append(upscale_image(crop, scale_for_height(text_height, crop.shape)))
+    return resized
@@ -0,0 +1,135 @@
+"""Re-run the FINAL.py verification over saved photos without the camera UI.
+
+Labels come either from a directory, where every subdirectory holds the three
+captures of one label (sorted by file name), or from a CSV manifest with
+device,image1,image2,image3 columns. Examples:
+
+    python verify_batch.py --dir photos/2026-10-17 --output results.csv
+    python verify_batch.py --manifest day.csv --workers 4 --output results.parquet
+    python verify_batch.py --manifest day.csv --sheet ocr_data
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ocr_pipeline import MATCH, build_row, load_image, verify_label
+from reader_pool import get_reader_pool
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+COLUMNS = ["device", "result1", "result2", "result3", "match_status", "timestamp"]
+
+
+def labels_from_dir(root, device_name):
+    """Yield (device, [image paths]) for every subdirectory holding three captures."""
+    for entry in sorted(os.scandir(root), key=lambda entry: entry.name):
+        if not entry.is_dir():
+            continue
+        images = sorted(
+            os.path.join(entry.path, name) for name in os.listdir(entry.path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if len(images) != 3:
+            print(f"Skipping {entry.path}: expected 3 images, found {len(images)}", file=sys.stderr)
+            continue
+        yield device_name or entry.name, images
+
+
+def labels_from_manifest(path):
+    """Yield (device, [image paths]) for every row of a device,image1,image2,image3 CSV."""
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            images = [os.path.join(base, row[f"image{i}"]) for i in (1, 2, 3)]
+            yield row.get("device", ""), images
+
+
+def verify(label):
+    """Return (row, seconds, error); a label that could not be read has no row, only its error."""
+    device_name, paths = label
+    start = time.perf_counter()
+    try:
+        _, results, all_match = verify_label([load_image(path) for path in paths], device_name)
+    except Exception as exc:
+        return None, time.perf_counter() - start, repr(exc)
+    return build_row(device_name, results, all_match), time.perf_counter() - start, None
+
+
+def write_rows(rows, output):
+    if output.endswith('.parquet'):
+        try:
+            import pandas as pd
+        except ImportError:
+            raise SystemExit("Writing Parquet needs pandas and pyarrow installed.")
+        pd.DataFrame(rows, columns=COLUMNS).to_parquet(output, index=False)
+        return
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--dir', help="directory with one subdirectory of three captures per label")
+    source.add_argument('--manifest', help="CSV with device,image1,image2,image3 columns")
+    parser.add_argument('--device', help="device name to record for --dir labels (default: subdirectory name)")
+    parser.add_argument('--workers', type=int, default=2, help="labels verified in parallel (default: 2)")
+    parser.add_argument('--output', help="write results to this .csv or .parquet file")
+    parser.add_argument('--sheet', help="also queue results for this Google Sheet")
+    args = parser.parse_args()
+
+    labels = list(labels_from_dir(args.dir, args.device) if args.dir else labels_from_manifest(args.manifest))
+    if not labels:
+        raise SystemExit("No labels found.")
+
+    # One warm reader per worker so no worker waits on a lease
+    get_reader_pool(size=args.workers)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        outcomes = list(executor.map(verify, labels))
+    elapsed = time.perf_counter() - start
+
+    # Labels that failed (missing file, undecodable photo) are reported, never saved as a no match
+    rows = [row for row, _, error in outcomes if error is None]
+    failed = [(paths, error) for (_, paths), (_, _, error) in zip(labels, outcomes) if error is not None]
+    for paths, error in failed:
+        print(f"Failed on {paths}: {error}", file=sys.stderr)
+    if args.output:
+        write_rows(rows, args.output)
+    if args.sheet:
+        from sheets_queue import get_write_queue
+        write_queue = get_write_queue(args.sheet)
+        for row in rows:
+            write_queue.put(row)
+        # Wait for the upload instead of the atexit close, which gives up after a few seconds
+        write_queue.close()
+        waiting, parked = write_queue.depth(), write_queue.spool.count_failed(args.sheet)
+        if waiting or parked:
+            print(f"{waiting} rows still waiting and {parked} parked in {write_queue.spool.path}; "
+                  f"they are uploaded on the next start or with `python sheets_queue.py requeue`",
+                  file=sys.stderr)
+    if not args.output and not args.sheet:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(COLUMNS)
+        writer.writerows(rows)
+
+    matches = sum(row[4] == MATCH for row in rows)
+    latencies = sorted(seconds for _, seconds, _ in outcomes)
+    print(
+        f"Verified {len(rows)} labels in {elapsed:.1f}s "
+        f"({len(outcomes) / elapsed * 60:.1f} labels/min, {args.workers} workers); "
+        f"{matches} match, {len(rows) - matches} no match, {len(failed)} failed; "
+        f"median {latencies[len(latencies) // 2]:.2f}s per label",
+        file=sys.stderr,
+    )
+    if failed or (args.sheet and (waiting or parked)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()